@@ -0,0 +1,162 @@
+import json
+import os
+import sys
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from dashboard_data import TARGET_RATE
+
+ALERTS_DIR = 'alerts'
+EVENTS_FILE = 'events.jsonl'
+STATE_FILE = 'state.parquet'
+
+KEY_COLUMNS = ['Entity_Type', 'Entity', 'Metric']
+
+# Rule inputs stored with each state row; a change to any of them re-classifies the row
+RULE_COLUMNS = ['Target', 'Good_Threshold', 'Warning_Threshold']
+
+# Status rank, worst first, so a crossing can be labelled improved or worsened
+STATUS_RANK = {'red': 0, 'below_target': 0, 'yellow': 1, 'green': 2, 'at_or_above_target': 2}
+
+
+def metric_rows(entity_type, df, key, metrics, targets=None):
+    """Long (entity, metric, value) rows for one metrics table"""
+    present = [metric for metric in metrics if metric in df.columns]
+    rows = df.melt(id_vars=[key], value_vars=present, var_name='Metric', value_name='Value')
+    rows = rows.rename(columns={key: 'Entity'})
+    rows.insert(0, 'Entity_Type', entity_type)
+    rows['Target'] = targets.reindex(rows['Entity']).values if targets is not None else np.nan
+    return rows
+
+
+def current_metrics(providers, metrics, site_performance, measure_performance, payer_performance):
+    """Every monitored value in the latest data, one row per entity and metric"""
+    threshold_metrics = list(metrics['Metric_Name'])
+    frames = [
+        metric_rows('provider', providers, 'Provider_Name', threshold_metrics),
+        metric_rows('provider', providers, 'Provider_Name', ['Overall_Score'],
+                    pd.Series(TARGET_RATE, index=providers['Provider_Name'])),
+        metric_rows('site', site_performance, 'Site_Location', ['Compliance_Rate'],
+                    site_performance.set_index('Site_Location')['Target_Rate']),
+        metric_rows('measure', measure_performance, 'Measure_Name', ['Compliance_Rate'],
+                    measure_performance.set_index('Measure_Name')['Target_Rate']),
+        metric_rows('payer', payer_performance, 'Payer_Type', ['Compliance_Rate'],
+                    payer_performance.set_index('Payer_Type')['Target_Rate'])
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+
+def with_rules(rows, metrics):
+    """Attach each row's scorecard thresholds from the metric definitions"""
+    rules = metrics.set_index('Metric_Name')
+    rows = rows.copy()
+    rows['Good_Threshold'] = rows['Metric'].map(rules['Good_Threshold']).values.astype(float)
+    rows['Warning_Threshold'] = rows['Metric'].map(rules['Warning_Threshold']).values.astype(float)
+    return rows
+
+
+def classify(rows):
+    """Status of each row: scorecard thresholds where defined, otherwise the target"""
+    good = rows['Good_Threshold'].values.astype(float)
+    warning = rows['Warning_Threshold'].values.astype(float)
+    value = rows['Value'].values.astype(float)
+
+    # A good threshold below the warning threshold means lower values are better
+    lower_is_better = good < warning
+    meets_good = np.where(lower_is_better, value <= good, value >= good)
+    meets_warning = np.where(lower_is_better, value <= warning, value >= warning)
+    threshold_status = np.select([meets_good, meets_warning], ['green', 'yellow'], 'red')
+
+    target = rows['Target'].values.astype(float)
+    target_status = np.where(value >= target, 'at_or_above_target', 'below_target')
+
+    return np.where(~np.isnan(good), threshold_status, target_status)
+
+
+def evaluate(current, previous, metrics, timestamp, version=None):
+    """Alert events for rows whose status changed since the previous evaluation
+
+    Only rows whose value, target or thresholds changed (or that are new)
+    are classified; the rest keep their stored status. Returns (events,
+    new state).
+    """
+    current = with_rules(current, metrics)
+    if previous is None or previous.empty:
+        state = current.copy()
+        state['Status'] = classify(state)
+        return [], state
+
+    # State written before thresholds were stored has no rule columns; those rows re-classify once
+    previous = previous.reindex(columns=KEY_COLUMNS + ['Value'] + RULE_COLUMNS + ['Status'])
+    previous = previous.rename(columns={'Status': 'Status_Previous'})
+    merged = current.merge(previous, on=KEY_COLUMNS, how='left', suffixes=('', '_Previous'))
+    changed = np.zeros(len(merged), dtype=bool)
+    for column in ['Value'] + RULE_COLUMNS:
+        now, before = merged[column], merged[column + '_Previous']
+        changed |= ((now != before) & ~(now.isna() & before.isna())).values
+
+    # A fresh array: writing into the column's own buffer would overwrite Status_Previous too
+    merged['Status'] = np.where(changed, classify(merged), merged['Status_Previous'].to_numpy(dtype=object))
+
+    crossed = merged[changed & merged['Status_Previous'].notna().values
+                     & (merged['Status'] != merged['Status_Previous']).values]
+    events = [
+        {
+            'timestamp': timestamp,
+            'data_version': version,
+            'entity_type': row.Entity_Type,
+            'entity': row.Entity,
+            'metric': row.Metric,
+            'previous_value': float(row.Value_Previous),
+            'value': float(row.Value),
+            'previous_status': row.Status_Previous,
+            'status': row.Status,
+            'direction': 'improved' if STATUS_RANK[row.Status] > STATUS_RANK[row.Status_Previous] else 'worsened'
+        }
+        for row in crossed.itertuples(index=False)
+    ]
+    return events, merged[current.columns.tolist() + ['Status']]
+
+
+def run_alerts(data_dir='.'):
+    """Evaluate the current data against the last evaluation and append any alert events"""
+    from dashboard_data import load_dashboard_data, data_version
+    from scorecard_data import load_scorecard_data
+
+    _, _, site_performance, _, payer_performance, measure_performance = load_dashboard_data(data_dir)
+    providers, metrics, _ = load_scorecard_data(data_dir)
+    current = current_metrics(providers, metrics, site_performance, measure_performance, payer_performance)
+
+    out_dir = os.path.join(data_dir, ALERTS_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+    state_path = os.path.join(out_dir, STATE_FILE)
+    previous = pd.read_parquet(state_path) if os.path.exists(state_path) else None
+
+    timestamp = pd.Timestamp.now(tz='UTC').isoformat()
+    events, state = evaluate(current, previous, metrics, timestamp, data_version(data_dir))
+
+    # One JSON event per line; appends from concurrent runs interleave whole lines
+    if events:
+        with open(os.path.join(out_dir, EVENTS_FILE), 'a') as f:
+            f.write(''.join(json.dumps(event, default=str) + '\n' for event in events))
+    state.to_parquet(state_path + '.tmp', index=False)
+    os.replace(state_path + '.tmp', state_path)
+    return events
+
+
+def recent_alerts(data_dir='.', limit=10):
+    """Latest alert events, newest first"""
+    path = os.path.join(data_dir, ALERTS_DIR, EVENTS_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        lines = deque(f, maxlen=limit)
+    return [json.loads(line) for line in reversed(lines)]
+
+
+if __name__ == '__main__':
+    # Run after every data refresh: python alerts.py [data_dir]
+    events = run_alerts(sys.argv[1] if len(sys.argv) > 1 else '.')
+    print(f"{len(events)} threshold crossings")
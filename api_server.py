@@ -0,0 +1,270 @@
+import hashlib
+import json
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+
+import compliance_engine
+import dashboard_data
+import gap_export
+import outreach_ranking
+import result_cache
+import scorecard_data
+import tenants
+
+# Rollup tables exposed under /api/rollups/{name}
+ROLLUPS = {
+    'monthly': 'monthly_trends',
+    'sites': 'site_performance',
+    'providers': 'provider_performance',
+    'payers': 'payer_performance',
+    'measures': 'measure_performance'
+}
+
+# Upper bound on rows returned by list endpoints
+MAX_ROWS = 1000
+
+class TenantData:
+    """Parsed tables for one tenant at one data version"""
+
+    def __init__(self, data_dir, version):
+        self.data_dir = data_dir
+        self.version = version
+        # Entries are shared with the Streamlit apps and survive restarts
+        (self.care_gaps, self.monthly_trends, self.site_performance, self.provider_performance,
+         self.payer_performance, self.measure_performance) = result_cache.cached(
+            'dashboard_data', data_dir, lambda: dashboard_data.load_dashboard_data(data_dir))
+        self.providers, self.metrics, self.trends = result_cache.cached(
+            'scorecard_data', data_dir, lambda: scorecard_data.load_scorecard_data(data_dir))
+        self.scorecard_table = result_cache.cached(
+            'scorecard_table', data_dir, lambda: scorecard_data.build_scorecard_table(self.providers, self.trends))
+        self.denominators = result_cache.cached(
+            'denominators', data_dir, lambda: compliance_engine.load_denominators(data_dir, self.care_gaps))
+
+
+SOURCE_FILES = (list(dashboard_data.DATA_FILES.values()) + list(scorecard_data.DATA_FILES.values())
+                + dashboard_data.OPTIONAL_FILES)
+
+
+def load_tenant(tenant):
+    """Current data for a tenant, reloading only when its files change"""
+    data_dir = tenants.tenant_dir(tenant)
+    version = dashboard_data.data_version(data_dir, SOURCE_FILES)
+    return tenants.TENANT_CACHE.get(tenant or '', version, lambda: TenantData(data_dir, version))
+
+
+async def current_data(request):
+    return await run_in_threadpool(load_tenant, request.query_params.get('tenant'))
+
+
+def error(message, status_code):
+    return Response(json.dumps({'error': message}), status_code=status_code, media_type='application/json')
+
+
+def records(df):
+    """Serialize a frame as a JSON list of row objects"""
+    return json.loads(df.to_json(orient='records', date_format='iso'))
+
+
+def request_filters(request):
+    """Sidebar-equivalent filters from repeatable ?site=&payer=&measure= parameters"""
+    params = request.query_params
+    return {
+        'sites': params.getlist('site') or None,
+        'payers': params.getlist('payer') or None,
+        'measures': params.getlist('measure') or None
+    }
+
+
+def int_param(request, name, default, low=1, high=MAX_ROWS):
+    """Integer query parameter within [low, high]; None when malformed or out of range"""
+    raw = request.query_params.get(name)
+    if raw is None:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        return None
+    return value if low <= value <= high else None
+
+
+def compliance_filters(filters):
+    """request_filters keyed by the denominator columns they restrict"""
+    return {
+        'Site_Location': filters['sites'],
+        'Payer_Type': filters['payers'],
+        'Measure_Category': filters['measures']
+    }
+
+
+def version_headers(request, data):
+    """Caching headers with an ETag keyed by the data version, path and query"""
+    key = f"{data.version}:{request.url.path}:{sorted(request.query_params.multi_items())}"
+    etag = '"' + hashlib.sha1(key.encode()).hexdigest()[:20] + '"'
+    return {'ETag': etag, 'Cache-Control': 'no-cache', 'X-Data-Version': data.version}
+
+
+def not_modified(request, headers):
+    return headers['ETag'] in request.headers.get('if-none-match', '')
+
+
+async def cached_json(request, build):
+    """Answer with a version-keyed ETag, returning 304 when the client copy is current"""
+    data = await current_data(request)
+    headers = version_headers(request, data)
+    if not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+
+    payload = await run_in_threadpool(build, data)
+    # NaN is not valid JSON; empty slices report null instead
+    body = json.dumps(payload, default=str, separators=(',', ':'), allow_nan=False)
+    return Response(body, media_type='application/json', headers=headers)
+
+
+async def tenant_list(request):
+    return Response(json.dumps({'tenants': tenants.list_tenants(), 'cache': tenants.TENANT_CACHE.stats()}),
+                    media_type='application/json')
+
+
+async def version(request):
+    return await cached_json(request, lambda data: {'version': data.version})
+
+
+async def kpis(request):
+    filters = request_filters(request)
+
+    def build(data):
+        filtered = dashboard_data.filter_gaps(data.care_gaps, **filters)
+        # Same recomputed rate as the dashboard card for this selection
+        measure_compliance = compliance_engine.compute_compliance(
+            data.denominators, data.care_gaps, filters=compliance_filters(filters), workers=1)
+        return dashboard_data.compute_kpis(filtered, data.monthly_trends, measure_compliance=measure_compliance)
+
+    return await cached_json(request, build)
+
+
+async def rollup(request):
+    name = request.path_params['name']
+    if name not in ROLLUPS:
+        return error(f"unknown rollup '{name}'", 404)
+    return await cached_json(request, lambda data: records(getattr(data, ROLLUPS[name])))
+
+
+async def top_gaps(request):
+    filters = request_filters(request)
+    n = int_param(request, 'n', 10)
+    if n is None:
+        return error(f"n must be an integer from 1 to {MAX_ROWS}", 400)
+    status = request.query_params.get('status')
+
+    def build(data):
+        filtered = dashboard_data.filter_gaps(data.care_gaps, **filters)
+        if status:
+            filtered = filtered[filtered['Gap_Status'] == status]
+        return records(dashboard_data.recent_gaps(filtered, n))
+
+    return await cached_json(request, build)
+
+
+async def compliance(request):
+    filters = request_filters(request)
+    group_by = request.query_params.getlist('group_by')
+
+    # Results are already per measure; any other denominator column can split them
+    data = await current_data(request)
+    allowed = set(data.denominators.columns) - {'Patient_ID', 'Measure_Name'}
+    unknown = [column for column in group_by if column not in allowed]
+    if unknown:
+        return error(f"cannot group by {', '.join(unknown)}; choose from {', '.join(sorted(allowed))}", 400)
+
+    def build(data):
+        result = compliance_engine.compute_compliance(data.denominators, data.care_gaps, group_by,
+                                                      compliance_filters(filters), workers=1)
+        return {'overall': compliance_engine.overall_compliance(result), 'measures': records(result)}
+
+    return await cached_json(request, build)
+
+
+async def worklists(request):
+    filters = request_filters(request)
+    by = request.query_params.get('by', 'Provider_Name')
+    k = int_param(request, 'k', 25)
+    owner = request.query_params.get('owner')
+    if by not in ('Provider_Name', 'Site_Location'):
+        return error(f"unknown worklist grouping '{by}'", 400)
+    if k is None:
+        return error(f"k must be an integer from 1 to {MAX_ROWS}", 400)
+
+    def build(data):
+        # Score against all gaps, then filter, so impact does not depend on the filters
+        scored = outreach_ranking.score_open_gaps(data.care_gaps, data.measure_performance, data.payer_performance)
+        scored = dashboard_data.filter_gaps(scored, **filters)
+        if owner:
+            scored = scored[scored[by] == owner]
+        return records(outreach_ranking.top_k_worklists(scored, by, k))
+
+    return await cached_json(request, build)
+
+
+async def export(request):
+    filters = request_filters(request)
+    fmt = request.query_params.get('format', 'csv.gz')
+    if fmt not in gap_export.EXPORT_FORMATS:
+        return error(f"unknown format '{fmt}'", 400)
+
+    data = await current_data(request)
+    headers = version_headers(request, data)
+    if not_modified(request, headers):
+        return Response(status_code=304, headers=headers)
+
+    filtered = await run_in_threadpool(dashboard_data.filter_gaps, data.care_gaps, **filters)
+    if fmt == 'xlsx' and len(filtered) > gap_export.EXCEL_MAX_ROWS:
+        return error(f"Excel export is limited to {gap_export.EXCEL_MAX_ROWS:,} rows; use csv.gz or parquet", 400)
+    extension, media_type = gap_export.EXPORT_FORMATS[fmt]
+    headers['Content-Disposition'] = f'attachment; filename="care_gaps.{extension}"'
+    return StreamingResponse(gap_export.stream_export(filtered, filters, data.version, fmt),
+                             media_type=media_type, headers=headers)
+
+
+async def scorecard(request):
+    return await cached_json(request, lambda data: records(data.scorecard_table))
+
+
+async def provider_metrics(request):
+    return await cached_json(request, lambda data: records(data.providers))
+
+
+routes = [
+    Route('/api/tenants', tenant_list),
+    Route('/api/version', version),
+    Route('/api/kpis', kpis),
+    Route('/api/rollups/{name}', rollup),
+    Route('/api/gaps/top', top_gaps),
+    Route('/api/gaps/export', export),
+    Route('/api/worklists', worklists),
+    Route('/api/compliance', compliance),
+    Route('/api/scorecard', scorecard),
+    Route('/api/providers', provider_metrics)
+]
+
+async def unknown_tenant(request, exc):
+    return error(str(exc), 404)
+
+
+async def invalid_tenant(request, exc):
+    return error(str(exc), 400)
+
+
+# Only tenant lookups map to client errors; anything else is a server error
+app = Starlette(routes=routes, exception_handlers={
+    tenants.UnknownTenant: unknown_tenant,
+    tenants.InvalidTenant: invalid_tenant
+})
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run('api_server:app', host='0.0.0.0', port=8000, workers=2, timeout_keep_alive=30)
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+# Dimensions every latency cube cell is keyed on: the sidebar filters and the breakdowns
+CUBE_DIMENSIONS = ['Site_Location', 'Payer_Type', 'Measure_Category', 'Measure_Name']
+
+
+def gap_durations(care_gaps):
+    """Days each gap has been observed and whether it closed in that time"""
+    closed = (care_gaps['Gap_Status'] == 'Closed').values
+
+    # Closed gaps contribute their observed time-to-close, open gaps are
+    # right-censored at their current age
+    days = np.where(
+        closed,
+        (care_gaps['Closed_Date'] - care_gaps['Open_Date']).dt.days,
+        care_gaps['Days_Open']
+    )
+    return np.clip(np.nan_to_num(days, nan=0), 0, None).astype(int), closed
+
+
+def data_as_of(care_gaps):
+    """Date the extract was taken, inferred from open gap ages or the latest closure"""
+    open_gaps = care_gaps[care_gaps['Gap_Status'] == 'Open']
+    if len(open_gaps):
+        return (open_gaps['Open_Date'] + pd.to_timedelta(open_gaps['Days_Open'], unit='D')).max()
+    return care_gaps['Closed_Date'].max()
+
+
+def build_latency_cube(care_gaps):
+    """Aggregate gaps into per-cell day histograms of closures and still-open gaps"""
+    days, closed = gap_durations(care_gaps)
+
+    cells = care_gaps[CUBE_DIMENSIONS].copy()
+    cells['Days'] = days
+    cells['Closed'] = closed
+
+    cube = cells.groupby(CUBE_DIMENSIONS + ['Closed', 'Days'], observed=True).size()
+    return cube.rename('Count').reset_index()
+
+
+def filter_cube(cube, filters=None):
+    mask = np.ones(len(cube), dtype=bool)
+    for column, values in (filters or {}).items():
+        mask &= cube[column].isin(values).values
+    return cube[mask]
+
+
+def histogram_length(cube):
+    return int(cube['Days'].max()) + 1 if len(cube) else 1
+
+
+def slice_histograms(cube, filters=None):
+    """Merge the day histograms of all cube cells matching the filters"""
+    cells = filter_cube(cube, filters)
+    length = histogram_length(cube)
+    closed_cells = cells[cells['Closed']]
+    open_cells = cells[~cells['Closed']]
+    closed_hist = np.bincount(closed_cells['Days'], weights=closed_cells['Count'], minlength=length)
+    open_hist = np.bincount(open_cells['Days'], weights=open_cells['Count'], minlength=length)
+    return closed_hist, open_hist
+
+
+def histogram_quantiles(hist, quantiles=(0.5, 0.9, 0.99)):
+    """Read days-to-close percentiles off a merged day histogram"""
+    total = hist.sum()
+    if total == 0:
+        return {q: np.nan for q in quantiles}
+    cumulative = np.cumsum(hist)
+    return {q: int(np.searchsorted(cumulative, q * total)) for q in quantiles}
+
+
+def survival_curve(closed_hist, open_hist):
+    """Kaplan-Meier share of gaps still open after each day"""
+    # Gaps at risk on day t are those closed or censored on or after t
+    at_risk = np.cumsum((closed_hist + open_hist)[::-1])[::-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        hazard = np.where(at_risk > 0, closed_hist / at_risk, 0.0)
+    survival = np.cumprod(1 - hazard)
+    return pd.DataFrame({'Days': np.arange(len(survival)), 'Still_Open': survival * 100})
+
+
+def group_histograms(cube, group_by, filters=None):
+    """Closed and open day histograms for each value of one dimension within the filtered slice
+
+    One bincount over the filtered cells fills every group at once.
+    Returns (values, closed, open) where row i of closed and open belongs
+    to values[i].
+    """
+    cells = filter_cube(cube, filters)
+    length = histogram_length(cube)
+    codes, values = pd.factorize(cells[group_by])
+    flat = codes * length + cells['Days'].values
+    size = len(values) * length
+    closed = cells['Closed'].values
+    counts = cells['Count'].values
+    closed_hists = np.bincount(flat[closed], weights=counts[closed], minlength=size).reshape(len(values), length)
+    open_hists = np.bincount(flat[~closed], weights=counts[~closed], minlength=size).reshape(len(values), length)
+    return values, closed_hists, open_hists
+
+
+def latency_summary(histograms, group_by, quantiles=(0.5, 0.9, 0.99)):
+    """Days-to-close percentiles for each group from group_histograms"""
+    columns = [group_by, 'Closed', 'Open'] + [f'P{int(q * 100)}_Days' for q in quantiles]
+    rows = []
+    for value, closed_hist, open_hist in zip(*histograms):
+        row = {group_by: value, 'Closed': int(closed_hist.sum()), 'Open': int(open_hist.sum())}
+        for q, days in histogram_quantiles(closed_hist, quantiles).items():
+            row[f'P{int(q * 100)}_Days'] = days
+        rows.append(row)
+    return pd.DataFrame(rows, columns=columns)
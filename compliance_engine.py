@@ -0,0 +1,145 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Optional patient x measure denominator extract from the EHR
+ELIGIBILITY_FILE = 'hedis_eligibility.csv'
+
+PATIENT_COLUMNS = ['Patient_ID', 'Patient_Age', 'Patient_Gender', 'Site_Location', 'Provider_Name', 'Payer_Type']
+
+# Denominator rules used when no eligibility extract is available. A
+# diagnosis is inferred from the patient having any gap in that measure
+# category (e.g. any Diabetes Care gap implies a diabetes diagnosis).
+MEASURE_SPECS = {
+    'HbA1c Testing': {'ages': (18, 75), 'requires': 'Diabetes Care'},
+    'Eye Exam - Diabetic': {'ages': (18, 75), 'requires': 'Diabetes Care'},
+    'Kidney Screening - Diabetic': {'ages': (18, 85), 'requires': 'Diabetes Care'},
+    'Diabetes Monitoring': {'ages': (18, 64), 'requires': 'Diabetes Care'},
+    'Colorectal Cancer Screening': {'ages': (45, 75)},
+    'Breast Cancer Screening': {'ages': (50, 74), 'gender': 'Female'},
+    'Blood Pressure Control': {'ages': (18, 85), 'requires': 'Chronic Disease'},
+    'Statin Adherence': {'ages': (21, 75), 'requires': 'Medication Management'}
+}
+
+
+def derive_denominators(care_gaps):
+    """Patient x measure denominator rows implied by the gap records and MEASURE_SPECS
+
+    Patients are attributed to the site, provider and payer of their first
+    recorded gap.
+    """
+    patients = care_gaps.drop_duplicates('Patient_ID')[PATIENT_COLUMNS].reset_index(drop=True)
+    categories = care_gaps.groupby('Patient_ID')['Measure_Category'].agg(set)
+    patient_categories = patients['Patient_ID'].map(categories)
+    measure_categories = care_gaps.drop_duplicates('Measure_Name').set_index('Measure_Name')['Measure_Category']
+
+    frames = []
+    for measure, category in measure_categories.items():
+        spec = MEASURE_SPECS.get(measure)
+        if spec is None:
+            # Unknown measure: only patients with a recorded gap for it are known to be eligible
+            eligible = patients['Patient_ID'].isin(care_gaps.loc[care_gaps['Measure_Name'] == measure, 'Patient_ID'])
+        else:
+            low, high = spec['ages']
+            eligible = patients['Patient_Age'].between(low, high)
+            if 'gender' in spec:
+                eligible &= patients['Patient_Gender'] == spec['gender']
+            if 'requires' in spec:
+                eligible &= patient_categories.apply(lambda cats: spec['requires'] in cats)
+        frame = patients[eligible.values].copy()
+        frame['Measure_Name'] = measure
+        frame['Measure_Category'] = category
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def load_denominators(data_dir, care_gaps):
+    """Eligibility extract if one is provided, otherwise denominators derived from the gaps"""
+    path = os.path.join(data_dir, ELIGIBILITY_FILE)
+    if not os.path.exists(path):
+        return derive_denominators(care_gaps)
+    return extract_denominators(pd.read_csv(path), care_gaps)
+
+
+def extract_denominators(eligibility, care_gaps):
+    """Denominator rows from an eligibility extract, minus exclusions"""
+    if 'Exclusion' in eligibility.columns:
+        eligibility = eligibility[~eligibility['Exclusion'].fillna(False).astype(bool)]
+    if 'Measure_Category' not in eligibility.columns:
+        categories = care_gaps.drop_duplicates('Measure_Name').set_index('Measure_Name')['Measure_Category']
+        eligibility['Measure_Category'] = eligibility['Measure_Name'].map(categories)
+    return eligibility
+
+
+def _measure_task(args):
+    """Numerator and denominator for one measure in a single vectorized pass"""
+    measure, denominators, open_patients, group_by = args
+    numerator = ~denominators['Patient_ID'].isin(open_patients).values
+    frame = pd.DataFrame({'Numerator': numerator.astype(int), 'Denominator': 1})
+    if group_by:
+        frame[group_by] = denominators[group_by].values
+        result = frame.groupby(group_by, dropna=False).sum().reset_index()
+    else:
+        result = frame.sum().to_frame().T
+    result.insert(0, 'Measure_Name', measure)
+    return result
+
+
+def compute_compliance(denominators, care_gaps, group_by=None, filters=None, workers=None):
+    """Numerator, denominator and compliance rate per measure for any filter slice
+
+    filters maps slice columns (site, provider, payer, measure category) to
+    allowed values. A patient is compliant for a measure unless they have an
+    open gap for it. Each measure runs as its own task; workers=1 keeps
+    everything in-process.
+    """
+    group_by = [group_by] if isinstance(group_by, str) else list(group_by or [])
+
+    mask = np.ones(len(denominators), dtype=bool)
+    for column, values in (filters or {}).items():
+        if values is not None:
+            mask &= denominators[column].isin(values).values
+    denominators = denominators[mask]
+
+    # An open gap counts against the patient wherever it was recorded
+    open_gaps = care_gaps[care_gaps['Gap_Status'] == 'Open']
+    open_by_measure = open_gaps.groupby('Measure_Name')['Patient_ID'].agg(set)
+    tasks = [
+        (measure, rows[['Patient_ID'] + group_by], list(open_by_measure.get(measure, ())), group_by)
+        for measure, rows in denominators.groupby('Measure_Name')
+    ]
+
+    if workers == 1 or len(tasks) <= 1:
+        results = list(map(_measure_task, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_measure_task, tasks))
+
+    if not results:
+        return pd.DataFrame(columns=['Measure_Name'] + group_by + ['Numerator', 'Denominator', 'Compliance_Rate'])
+    compliance = pd.concat(results, ignore_index=True)
+    compliance['Compliance_Rate'] = (compliance['Numerator'] / compliance['Denominator'] * 100).round(1)
+    return compliance
+
+
+def overall_compliance(compliance):
+    """Pooled rate across measures: total numerator over total denominator; None for an empty slice"""
+    denominator = compliance['Denominator'].sum()
+    return float(compliance['Numerator'].sum() / denominator * 100) if denominator else None
+
+
+if __name__ == '__main__':
+    # Batch recalculation: python compliance_engine.py [data_dir] [group_by ...] -> measure_compliance.csv
+    from dashboard_data import load_dashboard_data
+
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else '.'
+    group_by = sys.argv[2:]
+    care_gaps = load_dashboard_data(data_dir)[0]
+
+    # One worker process per measure
+    compliance = compute_compliance(load_denominators(data_dir, care_gaps), care_gaps, group_by)
+    compliance.to_csv(os.path.join(data_dir, 'measure_compliance.csv'), index=False)
+    print(f"Wrote {len(compliance)} compliance rows")
@@ -1,9 +1,19 @@
+import time
+import os
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime
-import numpy as np
+import startup
+from tenants import tenant_dir, InvalidTenant, UnknownTenant, TENANT_CACHE_ENTRIES
+from dashboard_data import load_dashboard_data, data_version, filter_gaps, compute_kpis, recent_gaps, TARGET_RATE
+from gap_export import cached_export, export_gaps, EXPORT_FORMATS, EXCEL_MAX_ROWS
+from forecasting import project_all, compliance_lookups
+from outreach_ranking import score_open_gaps, top_k_worklists
+from compliance_engine import ELIGIBILITY_FILE, load_denominators, derive_denominators, extract_denominators, compute_compliance
+from snapshots import SnapshotStore, load_as_of, eligibility_as_of, snapshot_version
+from result_cache import cached
+from closure_latency import data_as_of, build_latency_cube, slice_histograms, group_histograms, histogram_quantiles, survival_curve, latency_summary
+
+run_start = time.perf_counter()
 
 # Page configuration
 st.set_page_config(
@@ -95,27 +105,77 @@ st.markdown("""
     """, unsafe_allow_html=True)
 
 # Load data
-@st.cache_data
-def load_data():
-    care_gaps = pd.read_csv('hedis_care_gaps.csv')
-    monthly_trends = pd.read_csv('monthly_trends.csv')
-    site_performance = pd.read_csv('site_performance.csv')
-    provider_performance = pd.read_csv('provider_performance.csv')
-    payer_performance = pd.read_csv('payer_performance.csv')
-    measure_performance = pd.read_csv('measure_performance.csv')
-    
-    # Convert dates
-    care_gaps['Open_Date'] = pd.to_datetime(care_gaps['Open_Date'])
-    care_gaps['Closed_Date'] = pd.to_datetime(care_gaps['Closed_Date'])
-    
-    return care_gaps, monthly_trends, site_performance, provider_performance, payer_performance, measure_performance
+# Cached per tenant directory and data version; least recently used tenants are evicted.
+# as_of selects a recorded snapshot instead of the live files. Misses fall through to the
+# on-disk result cache, so a restarted or newly added server process starts warm.
+@st.cache_data(max_entries=TENANT_CACHE_ENTRIES)
+def load_data(data_dir, version, as_of=None):
+    if as_of:
+        return cached('dashboard_data', data_dir, lambda: load_as_of(data_dir, as_of)[0], as_of)
+    return startup.preloaded('dashboard', version) or cached('dashboard_data', data_dir, lambda: load_dashboard_data(data_dir))
+
+# Validation summary of the live files; the loaders themselves write nothing
+@st.cache_data(max_entries=TENANT_CACHE_ENTRIES)
+def load_validation_report(data_dir, version):
+    return cached('validation_report', data_dir, lambda: load_dashboard_data(data_dir, with_report=True)[1][0])
+
+@st.cache_data(max_entries=TENANT_CACHE_ENTRIES)
+def load_latency_cube(data_dir, version, as_of=None):
+    return cached('latency_cube', data_dir, lambda: build_latency_cube(load_data(data_dir, version, as_of)[0]), as_of)
+
+# Projections follow the sidebar filters and start from the recomputed compliance rates.
+# They are cheap at dashboard scale, so fit them in-process.
+@st.cache_data(max_entries=TENANT_CACHE_ENTRIES)
+def load_projections(data_dir, version, filters, as_of=None):
+    def compute():
+        care_gaps = load_data(data_dir, version, as_of)[0]
+        selected = filter_gaps(care_gaps, filters['Site_Location'], filters['Payer_Type'], filters['Measure_Category'])
+        lookups = compliance_lookups(load_compliance_denominators(data_dir, version, as_of), care_gaps, filters)
+        return project_all(selected, lookups, as_of=data_as_of(care_gaps), workers=1)
+    return cached('projections', data_dir, compute, as_of,
+                  filters={column: sorted(map(str, values)) for column, values in filters.items()})
+
+@st.cache_data(max_entries=TENANT_CACHE_ENTRIES)
+def load_compliance_denominators(data_dir, version, as_of=None):
+    def compute():
+        care_gaps = load_data(data_dir, version, as_of)[0]
+        if not as_of:
+            return load_denominators(data_dir, care_gaps)
+        # Historical views use the eligibility recorded with the snapshot, never the live file
+        eligibility = eligibility_as_of(data_dir, as_of)
+        return derive_denominators(care_gaps) if eligibility is None else extract_denominators(eligibility, care_gaps)
+    return cached('denominators', data_dir, compute, as_of)
+
+# Resolve the tenant from ?tenant= or HEDIS_TENANT; none means the repo-root data
+tenant = st.query_params.get('tenant') or os.environ.get('HEDIS_TENANT')
+try:
+    data_dir = tenant_dir(tenant)
+except (InvalidTenant, UnknownTenant) as e:
+    st.error(str(e))
+    st.stop()
+
+# Time travel: view the dashboard as it stood on a recorded snapshot date
+view_as_of = st.sidebar.selectbox(
+    "📅 View as of",
+    options=['Latest'] + SnapshotStore(data_dir).dates()[::-1]
+)
+as_of = None if view_as_of == 'Latest' else view_as_of
 
 # Load all datasets
-care_gaps, monthly_trends, site_performance, provider_performance, payer_performance, measure_performance = load_data()
+current_version = snapshot_version(data_dir, as_of) if as_of else data_version(data_dir)
+care_gaps, monthly_trends, site_performance, provider_performance, payer_performance, measure_performance = load_data(data_dir, current_version, as_of)
+latency_cube = load_latency_cube(data_dir, current_version, as_of)
+
+# Header reports the last complete quarter and the extract date
+last_updated = pd.Timestamp(as_of) if as_of else data_as_of(care_gaps)
+reporting_quarter = pd.Period(last_updated, freq='Q') - 1
 
 # Title and header
 st.title("📊 HEDIS Care Gap Closure Dashboard")
-st.markdown("**Q4 2024 Performance Overview** | Last Updated: January 9, 2025")
+st.markdown(
+    f"**Q{reporting_quarter.quarter} {reporting_quarter.year} Performance Overview** | "
+    f"{'As of' if as_of else 'Last Updated'}: {last_updated:%B} {last_updated.day}, {last_updated.year}"
+)
 st.markdown("---")
 
 # Sidebar filters
@@ -139,20 +199,29 @@ selected_measures = st.sidebar.multiselect(
 )
 
 # Filter data
-filtered_gaps = care_gaps[
-    (care_gaps['Site_Location'].isin(selected_sites)) &
-    (care_gaps['Payer_Type'].isin(selected_payers)) &
-    (care_gaps['Measure_Category'].isin(selected_measures))
-]
+filtered_gaps = filter_gaps(care_gaps, selected_sites, selected_payers, selected_measures)
+
+# Recompute compliance for the selection from numerators and denominators
+compliance_filters = {
+    'Site_Location': selected_sites,
+    'Payer_Type': selected_payers,
+    'Measure_Category': selected_measures
+}
+measure_compliance = compute_compliance(
+    load_compliance_denominators(data_dir, current_version, as_of), care_gaps,
+    filters=compliance_filters, workers=1
+)
+projections, period_end = load_projections(data_dir, current_version, compliance_filters, as_of)
 
 # Calculate KPIs
-total_gaps = len(filtered_gaps)
-open_gaps = len(filtered_gaps[filtered_gaps['Gap_Status'] == 'Open'])
-closed_gaps = len(filtered_gaps[filtered_gaps['Gap_Status'] == 'Closed'])
-closure_rate = (closed_gaps / total_gaps * 100) if total_gaps > 0 else 0
-current_compliance = monthly_trends.iloc[-1]['Compliance_Rate']
-target_rate = 85.0
-monthly_change = monthly_trends.iloc[-1]['Compliance_Rate'] - monthly_trends.iloc[-2]['Compliance_Rate']
+kpis = compute_kpis(filtered_gaps, monthly_trends, TARGET_RATE, measure_compliance)
+total_gaps = kpis['total_gaps']
+open_gaps = kpis['open_gaps']
+closed_gaps = kpis['closed_gaps']
+closure_rate = kpis['closure_rate']
+current_compliance = kpis['current_compliance']
+target_rate = kpis['target_rate']
+monthly_change = kpis['monthly_change']
 
 # KPI Section
 col1, col2, col3, col4 = st.columns(4)
@@ -175,19 +244,27 @@ with col2:
 with col3:
     st.metric(
         label="🎯 Compliance Rate",
-        value=f"{current_compliance:.1f}%",
-        delta=f"{current_compliance - target_rate:+.1f}% vs target"
+        value=f"{current_compliance:.1f}%" if current_compliance is not None else "—",
+        delta=f"{current_compliance - target_rate:+.1f}% vs target" if current_compliance is not None else None
     )
 
 with col4:
+    projected_compliance = projections[None]['Projected_Compliance'].iloc[0]
     st.metric(
         label="📈 Monthly Change",
         value=f"{monthly_change:+.1f}%",
-        delta="Above trajectory" if monthly_change > 0 else "Below trajectory"
+        delta=f"Projected {projected_compliance:.1f}% by {period_end:%b %d}" if pd.notna(projected_compliance) else None
     )
 
+startup.mark('first paint')
+
 st.markdown("---")
 
+# Charts start here; importing plotly now lets the header and KPI cards paint first
+with startup.timed('import plotly'):
+    import plotly.express as px
+    import plotly.graph_objects as go
+
 # Row 1: Monthly Trend (full width)
 st.subheader("📈 Monthly Compliance Trend (2024-2025)")
 
@@ -370,6 +447,21 @@ with col2:
     
     st.plotly_chart(fig_payer, use_container_width=True)
 
+with st.expander("🧮 Compliance numerators and denominators for this selection"):
+    if as_of:
+        has_extract = eligibility_as_of(data_dir, as_of) is not None
+    else:
+        has_extract = os.path.exists(os.path.join(data_dir, ELIGIBILITY_FILE))
+    st.caption(
+        "Patients eligible for each measure (denominator) and those without an open gap for it (numerator). "
+        f"Using {'the eligibility extract' if has_extract else 'denominators derived from gap records and HEDIS age/gender rules'}."
+    )
+    st.dataframe(
+        measure_compliance.sort_values('Compliance_Rate'),
+        use_container_width=True,
+        hide_index=True
+    )
+
 st.markdown("---")
 
 # Row 4: Gap Status Distribution and Detailed Table
@@ -401,20 +493,15 @@ with col1:
     st.markdown(f"""
     **Summary:**
     - Total Gaps: **{total_gaps}**
-    - Closed: **{closed_gaps}** ({closed_gaps/total_gaps*100:.1f}%)
-    - Open: **{open_gaps}** ({open_gaps/total_gaps*100:.1f}%)
+    - Closed: **{closed_gaps}** ({closed_gaps/max(total_gaps, 1)*100:.1f}%)
+    - Open: **{open_gaps}** ({open_gaps/max(total_gaps, 1)*100:.1f}%)
     """)
 
 with col2:
     st.subheader("📋 Recent Gap Details")
     
     # Show recent gaps
-    display_gaps = filtered_gaps.sort_values('Open_Date', ascending=False).head(10)
-    
-    display_df = display_gaps[[
-        'Gap_ID', 'Measure_Name', 'Gap_Status', 
-        'Site_Location', 'Provider_Name', 'Days_Open'
-    ]].copy()
+    display_df = recent_gaps(filtered_gaps, 10)
     
     st.dataframe(
         display_df,
@@ -423,6 +510,158 @@ with col2:
         hide_index=True
     )
 
+    # Export the full filtered gap list
+    export_col1, export_col2 = st.columns([1, 2])
+
+    with export_col1:
+        export_format = st.selectbox("Export format", options=list(EXPORT_FORMATS.keys()))
+
+    with export_col2:
+        # Serialize only when asked; a prepared file stays downloadable across reruns
+        export_filters = {'sites': selected_sites, 'payers': selected_payers, 'measures': selected_measures}
+        export_file = cached_export(export_filters, current_version, export_format)
+        if export_format == 'xlsx' and len(filtered_gaps) > EXCEL_MAX_ROWS:
+            st.error(f"Excel export is limited to {EXCEL_MAX_ROWS:,} rows; choose csv.gz or parquet")
+        elif export_file is None and st.button(f"📦 Prepare export of {len(filtered_gaps)} gaps"):
+            with st.spinner("Writing export..."):
+                export_file = export_gaps(filtered_gaps, export_filters, current_version, export_format)
+        if export_file is not None:
+            with open(export_file, 'rb') as f:
+                st.download_button(
+                    label=f"⬇️ Download {len(filtered_gaps)} gaps",
+                    data=f,
+                    file_name=f"care_gaps.{EXPORT_FORMATS[export_format][0]}",
+                    mime=EXPORT_FORMATS[export_format][1]
+                )
+
+st.markdown("---")
+
+# Outreach worklist: open gaps ranked by how much closing them moves their measure
+st.subheader("🎯 Outreach Worklist")
+
+col1, col2, col3 = st.columns([1, 2, 1])
+
+with col1:
+    worklist_by = st.selectbox(
+        "Worklist for",
+        options=['Provider_Name', 'Site_Location'],
+        format_func=lambda x: 'Provider' if x == 'Provider_Name' else 'Site'
+    )
+
+with col2:
+    worklist_owner = st.selectbox(
+        "Select " + ('Provider' if worklist_by == 'Provider_Name' else 'Site'),
+        options=sorted(filtered_gaps[worklist_by].dropna().unique())
+    )
+
+with col3:
+    worklist_size = st.number_input("Gaps", min_value=5, max_value=500, value=25, step=5)
+
+# Score against all gaps so a gap's impact does not depend on the sidebar filters
+scored_gaps = filter_gaps(score_open_gaps(care_gaps, measure_performance, payer_performance),
+                          selected_sites, selected_payers, selected_measures)
+worklist = top_k_worklists(scored_gaps[scored_gaps[worklist_by] == worklist_owner], worklist_by, int(worklist_size))
+
+st.dataframe(
+    worklist.drop(columns=[worklist_by]),
+    use_container_width=True,
+    hide_index=True
+)
+
+# Row 5: Time-to-Close Distribution
+st.subheader("⏱️ Time-to-Close Distribution")
+
+latency_filters = {
+    'Site_Location': selected_sites,
+    'Payer_Type': selected_payers,
+    'Measure_Category': selected_measures
+}
+closed_hist, open_hist = slice_histograms(latency_cube, latency_filters)
+latency_quantiles = histogram_quantiles(closed_hist)
+
+col1, col2, col3, col4 = st.columns(4)
+
+with col1:
+    st.metric(label="Median Days to Close", value=f"{latency_quantiles[0.5]}")
+
+with col2:
+    st.metric(label="P90 Days to Close", value=f"{latency_quantiles[0.9]}")
+
+with col3:
+    st.metric(label="P99 Days to Close", value=f"{latency_quantiles[0.99]}")
+
+with col4:
+    st.metric(label="Still Open", value=f"{int(open_hist.sum())}")
+
+latency_group = st.radio(
+    "Break down by",
+    options=['Measure_Name', 'Site_Location'],
+    format_func=lambda x: 'Measure' if x == 'Measure_Name' else 'Site',
+    horizontal=True
+)
+latency_histograms = group_histograms(latency_cube, latency_group, latency_filters)
+latency_table = latency_summary(latency_histograms, latency_group)
+
+col1, col2 = st.columns([2, 1])
+
+with col1:
+    fig_survival = go.Figure()
+
+    for value, group_closed, group_open in zip(*latency_histograms):
+        curve = survival_curve(group_closed, group_open)
+
+        fig_survival.add_trace(go.Scatter(
+            x=curve['Days'],
+            y=curve['Still_Open'],
+            mode='lines',
+            name=value,
+            line=dict(width=2, shape='hv')
+        ))
+
+    fig_survival.update_layout(
+        title="Share of Gaps Still Open by Days Since Opened",
+        height=400,
+        xaxis_title="Days Since Gap Opened",
+        yaxis_title="Still Open (%)",
+        plot_bgcolor='white',
+        yaxis=dict(gridcolor='#e5e7eb', range=[0, 100])
+    )
+
+    st.plotly_chart(fig_survival, use_container_width=True)
+
+with col2:
+    st.dataframe(
+        latency_table,
+        use_container_width=True,
+        height=400,
+        hide_index=True
+    )
+
+st.markdown("---")
+
+# Row 6: Period-End Projection
+st.subheader(f"🔮 Projected Compliance by {period_end:%B %d, %Y}")
+st.caption("Open gaps in the current filter selection are projected forward with the historical closure rate "
+           "for gaps of the same age, starting from the recomputed compliance rates.")
+
+projection_dimension = st.radio(
+    "Project by",
+    options=['Measure_Name', 'Site_Location', 'Provider_Name'],
+    format_func=lambda x: x.split('_')[0],
+    horizontal=True,
+    key='projection_dimension'
+)
+projection_table = projections[projection_dimension].sort_values('Projected_vs_Target')
+
+st.dataframe(
+    projection_table,
+    use_container_width=True,
+    hide_index=True,
+    column_config={
+        'Projected_vs_Target': st.column_config.NumberColumn(format="%+.1f")
+    }
+)
+
 st.markdown("---")
 
 # Footer with insights
@@ -454,6 +693,22 @@ with col3:
     - Medication adherence program
     """)
 
+# Data quality summary of the live gap records
+validation_report = load_validation_report(data_dir, data_version(data_dir))
+if validation_report:
+    st.sidebar.markdown("---")
+    st.sidebar.markdown("### 🧪 Data Quality")
+    quality_message = (
+        f"{validation_report['clean_rows']} of {validation_report['rows']} gap records loaded  \n"
+        f"{validation_report['quarantined_rows']} quarantined, "
+        f"{validation_report['flagged_rows'] - validation_report['quarantined_rows']} with warnings  \n"
+        f"{validation_report['rollup_mismatches']} rollup counts disagree with gap records"
+    )
+    if validation_report['quarantined_rows'] or validation_report['rollup_mismatches']:
+        st.sidebar.warning(quality_message)
+    else:
+        st.sidebar.success(quality_message)
+
 # Sidebar additional info
 st.sidebar.markdown("---")
 st.sidebar.markdown("### 📊 Dashboard Info")
@@ -471,3 +726,8 @@ st.sidebar.info("""
 st.sidebar.markdown("### 👤 Created By")
 st.sidebar.markdown("Clinical Data Analyst Candidate")
 st.sidebar.markdown("Interview Demonstration")
+
+if startup.ENABLED:
+    startup.TIMINGS['last script run'] = (time.perf_counter() - run_start) * 1000
+    with st.sidebar.expander("⏱️ Startup Timings"):
+        st.dataframe(startup.timings_table(), use_container_width=True, hide_index=True)
@@ -0,0 +1,129 @@
+import hashlib
+import os
+
+import pandas as pd
+
+from compliance_engine import ELIGIBILITY_FILE, overall_compliance
+from data_validation import validate_dashboard_data, shared_tables
+
+TARGET_RATE = 85.0
+
+# Source files behind the care gap dashboard
+DATA_FILES = {
+    'care_gaps': 'hedis_care_gaps.csv',
+    'monthly_trends': 'monthly_trends.csv',
+    'site_performance': 'site_performance.csv',
+    'provider_performance': 'provider_performance.csv',
+    'payer_performance': 'payer_performance.csv',
+    'measure_performance': 'measure_performance.csv'
+}
+
+# Optional inputs; a version still changes when one is added or removed
+OPTIONAL_FILES = [ELIGIBILITY_FILE]
+
+GAP_DETAIL_COLUMNS = ['Gap_ID', 'Measure_Name', 'Gap_Status', 'Site_Location', 'Provider_Name', 'Days_Open']
+
+
+def source_path(data_dir, filename):
+    """Path of a source file, preferring a columnar Parquet copy when one exists"""
+    parquet_path = os.path.join(data_dir, os.path.splitext(filename)[0] + '.parquet')
+    if os.path.exists(parquet_path):
+        return parquet_path
+    return os.path.join(data_dir, filename)
+
+
+def read_table(data_dir, filename):
+    path = source_path(data_dir, filename)
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def data_version(data_dir='.', files=None):
+    """Short fingerprint of the source files that changes whenever any of them does"""
+    digest = hashlib.sha1(os.path.abspath(data_dir).encode())
+    for filename in sorted(files or list(DATA_FILES.values()) + OPTIONAL_FILES):
+        path = source_path(data_dir, filename)
+        if filename in OPTIONAL_FILES and not os.path.exists(path):
+            digest.update(f"{filename}:absent".encode())
+            continue
+        stat = os.stat(path)
+        digest.update(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:16]
+
+
+def load_dashboard_data(data_dir='.', validate=True, with_report=False):
+    """Read all dashboard tables and parse gap dates
+
+    With validate, gap records are checked against the rollups and rows
+    failing an error check are dropped. Nothing is written; with
+    with_report, (frames, (report, flagged rows, rollup mismatches)) is
+    returned so an ingest step can save the outputs.
+    """
+    care_gaps = read_table(data_dir, DATA_FILES['care_gaps'])
+    monthly_trends = read_table(data_dir, DATA_FILES['monthly_trends'])
+    site_performance = read_table(data_dir, DATA_FILES['site_performance'])
+    provider_performance = read_table(data_dir, DATA_FILES['provider_performance'])
+    payer_performance = read_table(data_dir, DATA_FILES['payer_performance'])
+    measure_performance = read_table(data_dir, DATA_FILES['measure_performance'])
+
+    # Convert dates
+    care_gaps['Open_Date'] = pd.to_datetime(care_gaps['Open_Date'], errors='coerce')
+    care_gaps['Closed_Date'] = pd.to_datetime(care_gaps['Closed_Date'], errors='coerce')
+
+    validation = None
+    if validate:
+        care_gaps, flagged, reconciliation, report = validate_dashboard_data(
+            care_gaps, site_performance, provider_performance, payer_performance, measure_performance,
+            skip_reconcile=shared_tables(data_dir)
+        )
+        validation = (report, flagged, reconciliation)
+
+    frames = (care_gaps, monthly_trends, site_performance, provider_performance, payer_performance, measure_performance)
+    return (frames, validation) if with_report else frames
+
+
+def filter_gaps(care_gaps, sites=None, payers=None, measures=None):
+    """Apply the sidebar filters; None means no restriction"""
+    mask = pd.Series(True, index=care_gaps.index)
+    if sites is not None:
+        mask &= care_gaps['Site_Location'].isin(sites)
+    if payers is not None:
+        mask &= care_gaps['Payer_Type'].isin(payers)
+    if measures is not None:
+        mask &= care_gaps['Measure_Category'].isin(measures)
+    return care_gaps[mask]
+
+
+def compute_kpis(filtered_gaps, monthly_trends, target_rate=TARGET_RATE, measure_compliance=None):
+    """Headline KPI values shown in the dashboard cards
+
+    measure_compliance (from compute_compliance for the filter selection)
+    replaces the latest monthly trend rate with the pooled recomputed rate,
+    which is None when the selection has no eligible patients.
+    """
+    total_gaps = len(filtered_gaps)
+    open_gaps = int((filtered_gaps['Gap_Status'] == 'Open').sum())
+    closed_gaps = int((filtered_gaps['Gap_Status'] == 'Closed').sum())
+    latest_compliance = float(monthly_trends.iloc[-1]['Compliance_Rate'])
+    monthly_change = latest_compliance - float(monthly_trends.iloc[-2]['Compliance_Rate'])
+    if measure_compliance is None:
+        current_compliance = latest_compliance
+    else:
+        current_compliance = overall_compliance(measure_compliance)
+
+    return {
+        'total_gaps': total_gaps,
+        'open_gaps': open_gaps,
+        'closed_gaps': closed_gaps,
+        'closure_rate': (closed_gaps / total_gaps * 100) if total_gaps > 0 else 0,
+        'current_compliance': current_compliance,
+        'target_rate': target_rate,
+        'monthly_change': monthly_change
+    }
+
+
+def recent_gaps(filtered_gaps, n=10):
+    """Most recently opened gaps for the detail table"""
+    display_gaps = filtered_gaps.sort_values('Open_Date', ascending=False).head(n)
+    return display_gaps[GAP_DETAIL_COLUMNS].copy()
@@ -0,0 +1,209 @@
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+VALIDATION_DIR = 'validation'
+
+REQUIRED_COLUMNS = ['Gap_ID', 'Patient_ID', 'Measure_Name', 'Gap_Status', 'Open_Date',
+                    'Site_Location', 'Provider_Name', 'Payer_Type']
+
+ENUMS = {
+    'Gap_Status': ['Open', 'Closed'],
+    'Priority_Level': ['High', 'Medium', 'Low']
+}
+
+# Rollup table -> key column shared with the gap records
+ROLLUP_KEYS = {
+    'site_performance': 'Site_Location',
+    'provider_performance': 'Provider_Name',
+    'payer_performance': 'Payer_Type',
+    'measure_performance': 'Measure_Name'
+}
+ROLLUP_COUNTS = ['Total_Gaps', 'Open_Gaps', 'Closed_Gaps']
+
+# Written by tenants.partition_by_site: org-wide tables copied into a tenant,
+# whose counts cannot match that tenant's gap records
+SHARED_TABLES_FILE = 'shared_tables.json'
+
+# Rows failing an error check are quarantined and left out of every KPI;
+# warnings are reported but the row is kept
+ERROR = 'error'
+WARNING = 'warning'
+
+
+def row_checks(care_gaps, site_performance, provider_performance, payer_performance, measure_performance):
+    """One boolean mask per check, True where a row fails it"""
+    status = care_gaps['Gap_Status']
+    open_date = care_gaps['Open_Date']
+    closed_date = care_gaps['Closed_Date']
+    is_closed = (status == 'Closed').values
+    is_open = (status == 'Open').values
+
+    checks = {
+        'missing_required': (ERROR, care_gaps[REQUIRED_COLUMNS].isna().any(axis=1).values),
+        'duplicate_gap_id': (ERROR, care_gaps['Gap_ID'].duplicated(keep='first').values),
+        'closed_without_date': (ERROR, is_closed & closed_date.isna().values),
+        'closed_before_opened': (ERROR, (closed_date < open_date).values),
+        'open_with_closed_date': (WARNING, is_open & closed_date.notna().values),
+        'unknown_site': (WARNING, ~care_gaps['Site_Location'].isin(site_performance['Site_Location']).values),
+        'unknown_payer': (WARNING, ~care_gaps['Payer_Type'].isin(payer_performance['Payer_Type']).values),
+        'unknown_measure': (WARNING, ~care_gaps['Measure_Name'].isin(measure_performance['Measure_Name']).values),
+        'unknown_provider': (WARNING, ~care_gaps['Provider_Name'].isin(provider_performance['Provider_Name']).values),
+        'age_out_of_range': (WARNING, ~care_gaps['Patient_Age'].between(0, 120).values)
+    }
+    for column, allowed in ENUMS.items():
+        severity = ERROR if column == 'Gap_Status' else WARNING
+        checks[f'invalid_{column.lower()}'] = (severity, ~care_gaps[column].isin(allowed).values)
+
+    recomputed = recompute_days_open(care_gaps)
+    checks['days_open_mismatch'] = (WARNING, (care_gaps['Days_Open'].values != recomputed) & ~np.isnan(recomputed))
+    return checks
+
+
+def extract_date(care_gaps):
+    """Most common date implied by open gaps' Open_Date + Days_Open"""
+    open_gaps = care_gaps[care_gaps['Gap_Status'] == 'Open']
+    implied = (open_gaps['Open_Date'] + pd.to_timedelta(open_gaps['Days_Open'], unit='D')).dropna()
+    if implied.empty:
+        return care_gaps['Closed_Date'].max()
+    return implied.mode().iloc[0]
+
+
+def recompute_days_open(care_gaps):
+    """Days_Open derived from the dates: to Closed_Date if closed, else to the extract date"""
+    end = care_gaps['Closed_Date'].where(care_gaps['Gap_Status'] == 'Closed', extract_date(care_gaps))
+    return (end - care_gaps['Open_Date']).dt.days.values.astype(float)
+
+
+def reconcile_rollups(care_gaps, rollups):
+    """Rollup count cells that disagree with counts recomputed from the gap records"""
+    mismatches = []
+    for table, rollup in rollups.items():
+        key = ROLLUP_KEYS[table]
+        recomputed = pd.DataFrame({
+            'Total_Gaps': care_gaps.groupby(key).size(),
+            'Open_Gaps': care_gaps[care_gaps['Gap_Status'] == 'Open'].groupby(key).size(),
+            'Closed_Gaps': care_gaps[care_gaps['Gap_Status'] == 'Closed'].groupby(key).size()
+        }).fillna(0).astype(int)
+
+        reported = rollup.set_index(key)[ROLLUP_COUNTS]
+        keys = reported.index.union(recomputed.index)
+        reported = reported.reindex(keys)
+        recomputed = recomputed.reindex(keys).fillna(0)
+
+        diff = (reported != recomputed).stack()
+        for (value, column) in diff[diff].index:
+            mismatches.append({
+                'Table': table,
+                'Key': value,
+                'Column': column,
+                'Reported': reported.at[value, column],
+                'Recomputed': int(recomputed.at[value, column])
+            })
+    return pd.DataFrame(mismatches, columns=['Table', 'Key', 'Column', 'Reported', 'Recomputed'])
+
+
+def shared_tables(data_dir):
+    """Names of tables in data_dir that are org-wide copies rather than its own rollups"""
+    path = os.path.join(data_dir, SHARED_TABLES_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def validate_dashboard_data(care_gaps, site_performance, provider_performance, payer_performance, measure_performance,
+                            skip_reconcile=()):
+    """Check gap records and rollups on ingest
+
+    Returns (clean gaps, flagged rows, rollup mismatches, report). Clean
+    gaps exclude rows failing an error check and carry Days_Open recomputed
+    from the dates; flagged rows list every row failing any check. Rollups
+    named in skip_reconcile are not compared with the gap counts.
+    """
+    start = time.perf_counter()
+    checks = row_checks(care_gaps, site_performance, provider_performance, payer_performance, measure_performance)
+
+    names = list(checks)
+    failures = np.column_stack([mask for _, mask in checks.values()])
+    is_error = np.array([severity == ERROR for severity, _ in checks.values()])
+    quarantine_mask = failures[:, is_error].any(axis=1)
+    flagged_mask = failures.any(axis=1)
+
+    # Label only the flagged rows with the checks they failed
+    flagged = care_gaps[flagged_mask].copy()
+    labels = np.array(names, dtype=object)
+    flagged['Failed_Checks'] = [', '.join(labels[row]) for row in failures[flagged_mask]]
+    flagged['Quarantined'] = quarantine_mask[flagged_mask]
+
+    clean = care_gaps[~quarantine_mask].copy()
+    recomputed = recompute_days_open(clean)
+    clean['Days_Open'] = np.where(np.isnan(recomputed), clean['Days_Open'].fillna(0), recomputed).astype(int)
+
+    rollups = {
+        'site_performance': site_performance,
+        'provider_performance': provider_performance,
+        'payer_performance': payer_performance,
+        'measure_performance': measure_performance
+    }
+    reconciliation = reconcile_rollups(clean, {name: df for name, df in rollups.items() if name not in skip_reconcile})
+
+    report = {
+        'rows': int(len(care_gaps)),
+        'clean_rows': int(len(clean)),
+        'quarantined_rows': int(quarantine_mask.sum()),
+        'flagged_rows': int(flagged_mask.sum()),
+        'checks': {name: {'severity': severity, 'failures': int(mask.sum())}
+                   for name, (severity, mask) in checks.items()},
+        'rollup_mismatches': int(len(reconciliation)),
+        'seconds': round(time.perf_counter() - start, 3)
+    }
+    return clean, flagged, reconciliation, report
+
+
+def _write_atomic(path, write):
+    """Call write(tmp_path), then move the result into place so readers never see a partial file"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_validation_outputs(report, flagged, reconciliation, out_dir):
+    """Write the JSON report, flagged/quarantined rows and rollup mismatches"""
+    os.makedirs(out_dir, exist_ok=True)
+
+    def write_report(path):
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    _write_atomic(os.path.join(out_dir, 'validation_report.json'), write_report)
+    _write_atomic(os.path.join(out_dir, 'quarantine.csv'), lambda path: flagged.to_csv(path, index=False))
+    _write_atomic(os.path.join(out_dir, 'rollup_reconciliation.csv'),
+                  lambda path: reconciliation.to_csv(path, index=False))
+
+
+def ingest(data_dir='.'):
+    """Validate a data directory and save the outputs to <data_dir>/validation/"""
+    from dashboard_data import load_dashboard_data
+
+    _, (report, flagged, reconciliation) = load_dashboard_data(data_dir, with_report=True)
+    write_validation_outputs(report, flagged, reconciliation, os.path.join(data_dir, VALIDATION_DIR))
+    return report
+
+
+if __name__ == '__main__':
+    # Run after every data refresh: python data_validation.py [data_dir]
+    report = ingest(sys.argv[1] if len(sys.argv) > 1 else '.')
+    print(f"{report['clean_rows']} of {report['rows']} rows clean, {report['quarantined_rows']} quarantined, "
+          f"{report['rollup_mismatches']} rollup mismatches")
@@ -0,0 +1,170 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from closure_latency import gap_durations, data_as_of
+from compliance_engine import compute_compliance, load_denominators, overall_compliance
+from dashboard_data import TARGET_RATE
+
+# Gap columns the projection needs; keeps what is shipped to worker processes small
+PROJECTION_COLUMNS = ['Gap_Status', 'Open_Date', 'Closed_Date', 'Days_Open',
+                      'Measure_Name', 'Site_Location', 'Provider_Name']
+
+# Slice dimensions projected alongside the overall rate
+PROJECTION_DIMENSIONS = ['Measure_Name', 'Site_Location', 'Provider_Name']
+
+# Pseudo-observations pulling sparse slices toward the pooled closure hazard
+PRIOR_WEIGHT = 10.0
+
+
+def period_horizon(as_of, period='M'):
+    """Days from the as-of date to the end of its month ('M') or quarter ('Q')"""
+    period_end = pd.Period(as_of, freq=period).end_time.normalize()
+    return max(int((period_end - as_of.normalize()).days), 0), period_end
+
+
+def fit_survival(codes, days, closed, n_slices, length, prior_weight=PRIOR_WEIGHT):
+    """Kaplan-Meier survival for every slice at once, shrunk toward the pooled hazard
+
+    Returns an (n_slices, length) matrix where entry [s, a] is the share of
+    gaps in slice s still open after day a.
+    """
+    flat = codes * length + days
+    events = np.bincount(flat[closed], minlength=n_slices * length).reshape(n_slices, length)
+    exits = np.bincount(flat, minlength=n_slices * length).reshape(n_slices, length)
+
+    # Gaps at risk on day a are those closed or censored on or after a
+    at_risk = np.cumsum(exits[:, ::-1], axis=1)[:, ::-1]
+
+    pooled_events = events.sum(axis=0)
+    pooled_at_risk = at_risk.sum(axis=0)
+    pooled_hazard = np.divide(pooled_events, pooled_at_risk,
+                              out=np.zeros(length), where=pooled_at_risk > 0)
+
+    # No closures are observed past the longest time-to-close, which would
+    # leave older open gaps a zero hazard forever. Beyond it, use the
+    # history's average daily rate (closures per gap-day at risk) as an
+    # exponential tail.
+    event_days = np.flatnonzero(pooled_events)
+    if len(event_days):
+        pooled_hazard[event_days[-1] + 1:] = pooled_events.sum() / pooled_at_risk.sum()
+
+    hazard = (events + prior_weight * pooled_hazard) / (at_risk + prior_weight)
+    return np.cumprod(1 - hazard, axis=1)
+
+
+def project_dimension(care_gaps, dimension, horizon, compliance=None, target_rate=TARGET_RATE):
+    """Expected closures and end-of-period compliance for each value of one dimension
+
+    compliance maps each slice value to its current compliance rate. The
+    number of eligible patients is implied from it and the open gap count
+    (open gaps are the non-compliant share), so each expected closure lifts
+    compliance by 1 / eligible.
+    """
+    if dimension is None:
+        codes, values = np.zeros(len(care_gaps), dtype=int), pd.Index(['All'])
+    else:
+        codes, values = pd.factorize(care_gaps[dimension], use_na_sentinel=False)
+    days, closed = gap_durations(care_gaps)
+    n_slices = len(values)
+    length = int(days.max(initial=0)) + horizon + 1
+
+    survival = fit_survival(codes, days, closed, n_slices, length)
+
+    # Probability each open gap closes within the horizon, given it is still open today
+    open_mask = ~closed
+    open_codes, ages = codes[open_mask], days[open_mask]
+    survived_so_far = survival[open_codes, ages]
+    survived_horizon = survival[open_codes, ages + horizon]
+    p_close = np.divide(survived_so_far - survived_horizon, survived_so_far,
+                        out=np.zeros(len(ages)), where=survived_so_far > 0)
+
+    open_gaps = np.bincount(open_codes, minlength=n_slices)
+    expected = np.bincount(open_codes, weights=p_close, minlength=n_slices)
+
+    name = dimension or 'Slice'
+    result = pd.DataFrame({
+        name: values,
+        'Open_Gaps': open_gaps,
+        'Expected_Closures': expected.round(1)
+    })
+
+    if compliance is not None:
+        current = pd.Series(values, dtype=object).map(compliance).astype(float).values
+        noncompliant_share = 1 - current / 100
+        eligible = np.divide(open_gaps, noncompliant_share,
+                             out=np.full(n_slices, np.nan), where=noncompliant_share > 0)
+        uplift = np.divide(expected, eligible, out=np.zeros(n_slices), where=eligible > 0) * 100
+        result['Current_Compliance'] = current.round(1)
+        result['Projected_Compliance'] = np.minimum(current + uplift, 100).round(1)
+        result['Projected_vs_Target'] = (result['Projected_Compliance'] - target_rate).round(1)
+
+    return result
+
+
+def _project_task(args):
+    care_gaps, dimension, horizon, compliance = args
+    return dimension, project_dimension(care_gaps, dimension, horizon, compliance)
+
+
+def compliance_lookups(denominators, care_gaps, filters=None, dimensions=PROJECTION_DIMENSIONS):
+    """Current compliance per slice value for each projection dimension
+
+    Rates are recomputed from numerators and denominators for the filter
+    slice, so they match the dashboard's compliance card rather than the
+    pre-aggregated rollups.
+    """
+    lookups = {None: {'All': overall_compliance(compute_compliance(denominators, care_gaps, filters=filters, workers=1))}}
+    for dimension in dimensions:
+        if dimension not in denominators.columns:
+            lookups[dimension] = {}
+            continue
+        # Measure_Name is already the per-measure key of every compliance row
+        compliance = compute_compliance(denominators, care_gaps, filters=filters, workers=1,
+                                        group_by=None if dimension == 'Measure_Name' else dimension)
+        pooled = compliance.groupby(dimension)[['Numerator', 'Denominator']].sum()
+        lookups[dimension] = (pooled['Numerator'] / pooled['Denominator'] * 100).to_dict()
+    return lookups
+
+
+def project_all(care_gaps, lookups, period='M', as_of=None, workers=None):
+    """Projections for every dimension in lookups, fitted in parallel worker processes
+
+    Returns ({dimension: projection frame}, period end date).
+    """
+    as_of = as_of if as_of is not None else data_as_of(care_gaps)
+    horizon, period_end = period_horizon(as_of, period)
+    gaps = care_gaps[PROJECTION_COLUMNS]
+    tasks = [(gaps, dimension, horizon, compliance) for dimension, compliance in lookups.items()]
+
+    if workers == 1:
+        results = map(_project_task, tasks)
+        return dict(results), period_end
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return dict(pool.map(_project_task, tasks)), period_end
+
+
+if __name__ == '__main__':
+    # Nightly batch: python forecasting.py [data_dir] [M|Q] -> compliance_projections.csv
+    from dashboard_data import load_dashboard_data
+
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else '.'
+    period = sys.argv[2] if len(sys.argv) > 2 else 'M'
+    care_gaps = load_dashboard_data(data_dir)[0]
+
+    lookups = compliance_lookups(load_denominators(data_dir, care_gaps), care_gaps)
+    projections, period_end = project_all(care_gaps, lookups, period)
+
+    frames = []
+    for dimension, projection in projections.items():
+        projection = projection.rename(columns={dimension or 'Slice': 'Slice'})
+        projection.insert(0, 'Dimension', dimension or 'Overall')
+        frames.append(projection)
+    output = pd.concat(frames, ignore_index=True)
+    output.insert(0, 'Period_End', period_end.date())
+    output.to_csv(os.path.join(data_dir, 'compliance_projections.csv'), index=False)
+    print(f"Wrote {len(output)} projections through {period_end:%Y-%m-%d}")
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import os
+import tempfile
+import zlib
+
+EXPORT_CACHE_DIR = os.path.join('.cache', 'exports')
+EXPORT_CACHE_BUDGET = int(os.environ.get('HEDIS_EXPORT_CACHE_MB', 512)) * 1024 * 1024
+BATCH_SIZE = 50_000
+CHUNK_SIZE = 1 << 20
+EXCEL_MAX_ROWS = 1_048_575  # Worksheet limit minus the header row
+
+# Export format -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    'csv.gz': ('csv.gz', 'application/gzip'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'xlsx': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+}
+
+
+def iter_batches(df, batch_size=BATCH_SIZE):
+    """Yield consecutive row slices of a frame without copying it
+
+    An empty frame still yields one empty batch, so writers emit the header
+    or schema and the export is a valid file with no rows.
+    """
+    for start in range(0, max(len(df), 1), batch_size):
+        yield df.iloc[start:start + batch_size]
+
+
+def export_key(filters, version, fmt):
+    """Cache key for an export of one filter selection at one data version"""
+    normalized = {name: sorted(values) if values is not None else None for name, values in sorted(filters.items())}
+    payload = json.dumps({'filters': normalized, 'version': version, 'format': fmt}, sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+def export_path(key, fmt, cache_dir=EXPORT_CACHE_DIR):
+    return os.path.join(cache_dir, f"{key}.{EXPORT_FORMATS[fmt][0]}")
+
+
+def touch(path):
+    """Mark an export as recently used; mtime orders eviction"""
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+
+
+def evict_exports(cache_dir=EXPORT_CACHE_DIR, max_bytes=EXPORT_CACHE_BUDGET, keep=None):
+    """Delete least recently used exports until the cache fits its budget
+
+    Files still being written (.tmp) and the one in keep are never removed.
+    Open handles keep reading a deleted file, so in-flight downloads finish.
+    """
+    files = []
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith('.tmp') or entry.path == keep:
+            continue
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in files) + (os.path.getsize(keep) if keep and os.path.exists(keep) else 0)
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def iter_csv_gz(batches):
+    """Gzip-compressed CSV bytes, produced one batch at a time"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip container
+    header = True
+    for batch in batches:
+        chunk = compressor.compress(batch.to_csv(index=False, header=header, date_format='%Y-%m-%d').encode())
+        header = False
+        if chunk:
+            yield chunk
+    yield compressor.flush()
+
+
+def write_parquet(batches, path):
+    """Append each batch as a row group of a single Parquet file"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for batch in batches:
+            table = pa.Table.from_pandas(batch, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression='zstd')
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_excel(batches, path):
+    """Stream batches into a write-only workbook so rows are not held in memory"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Care Gaps')
+    rows_written = 0
+    for batch in batches:
+        if rows_written == 0:
+            sheet.append(list(batch.columns))
+        rows_written += len(batch)
+        if rows_written > EXCEL_MAX_ROWS:
+            raise ValueError(f"Excel export is limited to {EXCEL_MAX_ROWS:,} rows; use CSV or Parquet")
+        for row in batch.astype(object).where(batch.notna(), None).itertuples(index=False):
+            sheet.append(list(row))
+    workbook.save(path)
+
+
+def _write_export(filtered_gaps, fmt, path):
+    """Write an export to a temp file next to path, then move it into place"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            if fmt == 'csv.gz':
+                for chunk in iter_csv_gz(iter_batches(filtered_gaps)):
+                    tmp.write(chunk)
+        if fmt == 'parquet':
+            write_parquet(iter_batches(filtered_gaps), tmp_path)
+        elif fmt == 'xlsx':
+            write_excel(iter_batches(filtered_gaps), tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    evict_exports(os.path.dirname(path), keep=path)
+
+
+def cached_export(filters, version, fmt, cache_dir=EXPORT_CACHE_DIR):
+    """Path to an already written export of this selection, or None"""
+    path = export_path(export_key(filters, version, fmt), fmt, cache_dir)
+    if not os.path.exists(path):
+        return None
+    touch(path)
+    return path
+
+
+def export_gaps(filtered_gaps, filters, version, fmt, cache_dir=EXPORT_CACHE_DIR):
+    """Path to a cached export of the filtered gaps, writing it on first request"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}'")
+    path = export_path(export_key(filters, version, fmt), fmt, cache_dir)
+    if os.path.exists(path):
+        touch(path)
+    else:
+        _write_export(filtered_gaps, fmt, path)
+    return path
+
+
+def iter_file(path, chunk_size=CHUNK_SIZE):
+    with open(path, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+def stream_export(filtered_gaps, filters, version, fmt, cache_dir=EXPORT_CACHE_DIR):
+    """Yield export bytes as soon as they are produced
+
+    CSV exports are compressed batch by batch and teed into the cache, so
+    the first bytes go out before the whole selection is serialized. Parquet
+    and Excel need their footer written first and are served from the cache.
+    """
+    if fmt != 'csv.gz':
+        yield from iter_file(export_gaps(filtered_gaps, filters, version, fmt, cache_dir))
+        return
+
+    path = export_path(export_key(filters, version, fmt), fmt, cache_dir)
+    if os.path.exists(path):
+        touch(path)
+        yield from iter_file(path)
+        return
+
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            for chunk in iter_csv_gz(iter_batches(filtered_gaps)):
+                tmp.write(chunk)
+                yield chunk
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    evict_exports(cache_dir, keep=path)
@@ -0,0 +1,162 @@
+import json
+import random
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+def pick_subset(rng, widget):
+    return rng.sample(list(widget.options), rng.randint(1, len(widget.options)))
+
+
+def pick_one(rng, widget):
+    return rng.choice(list(widget.options))
+
+
+def pick_flag(rng, widget):
+    return rng.random() < 0.5
+
+
+def pick_in_range(rng, widget):
+    return rng.randint(widget.min, widget.max)
+
+
+# Interaction traces: (widget type, widget label, value picker). Each step
+# sets one widget and triggers a rerun, like a user changing a control.
+# Tabs are not listed: switching tabs happens in the browser without a rerun.
+TRACES = {
+    'dashboard_app.py': [
+        ('multiselect', 'Select Sites', pick_subset),
+        ('multiselect', 'Select Payer Types', pick_subset),
+        ('radio', 'Break down by', pick_one),
+        ('selectbox', 'Worklist for', pick_one),
+        ('radio', 'Project by', pick_one),
+        ('multiselect', 'Select Measures', pick_subset),
+        ('selectbox', 'Export format', pick_one),
+        ('selectbox', '📅 View as of', pick_one)
+    ],
+    'scorecard_dashboard.py': [
+        ('selectbox', 'Compare provider', pick_one),
+        ('slider', 'Peer group size', pick_in_range),
+        ('multiselect', 'Filter by Metric Category', pick_subset),
+        ('selectbox', 'Select Provider for Detailed View', pick_one),
+        ('selectbox', 'Select Provider for Detailed View', lambda rng, widget: 'All Providers'),
+        ('checkbox', 'Show Trend Indicators', pick_flag),
+        ('checkbox', 'Show Provider Rankings', pick_flag),
+        ('selectbox', '📅 View as of', pick_one)
+    ]
+}
+
+
+def find_widget(app, widget_type, label):
+    for widget in getattr(app, widget_type):
+        if widget.label == label:
+            return widget
+    return None
+
+
+def rendered(app):
+    """False for a rerun that left the page empty without raising"""
+    return len(app.main.children) + len(app.sidebar.children) > 0
+
+
+def run_session(script, iterations, seed, think_time=0.0, timeout=60):
+    """Drive one headless session through the trace and time every rerun
+
+    A rerun fails if it raises or renders an empty page; a step fails if
+    its widget is missing. Failed reruns are counted, not timed, so they
+    cannot pull the latency percentiles down.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    trace = TRACES[script]
+    rng = random.Random(seed)
+    latencies, errors, missing = [], 0, 0
+
+    def timed_run():
+        nonlocal errors
+        start = time.perf_counter()
+        app.run()
+        elapsed = time.perf_counter() - start
+        if app.exception or not rendered(app):
+            errors += 1
+        else:
+            latencies.append(elapsed)
+
+    app = AppTest.from_file(script, default_timeout=timeout)
+    timed_run()
+
+    for _ in range(iterations):
+        for widget_type, label, picker in trace:
+            widget = find_widget(app, widget_type, label)
+            if widget is None:
+                missing += 1
+                continue
+            widget.set_value(picker(rng, widget))
+            timed_run()
+            if think_time:
+                time.sleep(rng.expovariate(1 / think_time))
+
+    return {'latencies': latencies, 'errors': errors, 'missing': missing, 'peak_rss_mb': peak_rss_mb()}
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def percentile(latencies, q):
+    return round(float(np.percentile(latencies, q)), 1) if len(latencies) else None
+
+
+def load_test(script, sessions=10, iterations=3, seed=0, think_time=0.0):
+    """Simulate concurrent sessions and summarize throughput, latency, failures and memory
+
+    AppTest is not safe to share across threads, so every session runs in
+    its own process. Sessions share the on-disk result cache but not the
+    in-memory Streamlit caches, like separate server processes.
+    """
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=sessions) as pool:
+        futures = [pool.submit(run_session, script, iterations, seed + i, think_time)
+                   for i in range(sessions)]
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array([latency for result in results for latency in result['latencies']]) * 1000
+    peak_rss = [result['peak_rss_mb'] for result in results]
+    return {
+        'script': script,
+        'sessions': sessions,
+        'reruns': int(len(latencies)),
+        'failed_reruns': sum(result['errors'] for result in results),
+        'missing_widgets': sum(result['missing'] for result in results),
+        'elapsed_s': round(elapsed, 2),
+        'reruns_per_s': round(len(latencies) / elapsed, 2) if elapsed else None,
+        'latency_ms': {
+            'p50': percentile(latencies, 50),
+            'p90': percentile(latencies, 90),
+            'p99': percentile(latencies, 99),
+            'max': round(float(latencies.max()), 1) if len(latencies) else None
+        },
+        'peak_rss_mb_per_session': {'max': round(max(peak_rss), 1), 'mean': round(sum(peak_rss) / len(peak_rss), 1)}
+    }
+
+
+if __name__ == '__main__':
+    # python loadtest.py <dashboard_app.py|scorecard_dashboard.py> [sessions] [iterations] [think_time]
+    script = sys.argv[1] if len(sys.argv) > 1 else 'dashboard_app.py'
+    sessions = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    iterations = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    think_time = float(sys.argv[4]) if len(sys.argv) > 4 else 0.0
+    if script not in TRACES:
+        sys.exit(f"No interaction trace for {script}; choose from {', '.join(sorted(TRACES))}")
+
+    report = load_test(script, sessions, iterations, think_time=think_time)
+    print(json.dumps(report, indent=2))
+    if report['failed_reruns'] or report['missing_widgets']:
+        sys.exit(1)
@@ -0,0 +1,110 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from dashboard_data import TARGET_RATE
+
+# Payers whose quality incentive is in jeopardy get their gaps worked first
+PAYER_WEIGHTS = {'At Risk': 1.5, 'Earning Incentive': 1.0}
+
+# Each point a measure sits below its goal adds this much weight to its gaps
+SHORTFALL_WEIGHT = 0.2
+
+# Gap age at which the age weight reaches 2x
+AGE_SCALE_DAYS = 365
+
+WORKLIST_COLUMNS = ['Gap_ID', 'Patient_ID', 'Measure_Name', 'Site_Location', 'Provider_Name',
+                    'Payer_Type', 'Days_Open', 'Priority_Level', 'Closure_Impact', 'Priority_Score']
+
+
+def score_open_gaps(care_gaps, measure_performance, payer_performance):
+    """Score every open gap by how much closing it moves its measure toward goal
+
+    Closure_Impact is the compliance points one closure adds to the measure
+    (eligible patients are implied from compliance and open gaps). The
+    score scales it up for measures below Target_Rate or National_Benchmark,
+    for older gaps, and for payers whose incentive is at risk.
+
+    Pass the unfiltered gaps and filter the scored rows afterwards: the
+    eligible count behind Closure_Impact is per measure, so scoring a
+    filtered slice would shrink it and inflate the impact.
+    """
+    open_gaps = care_gaps[care_gaps['Gap_Status'] == 'Open']
+
+    measures = measure_performance.set_index('Measure_Name')
+    compliance = open_gaps['Measure_Name'].map(measures['Compliance_Rate']).values
+    goal = open_gaps['Measure_Name'].map(
+        measures[['Target_Rate', 'National_Benchmark']].max(axis=1)
+    ).fillna(TARGET_RATE).values
+    measure_open = open_gaps.groupby('Measure_Name')['Gap_ID'].transform('size').values
+
+    noncompliant_share = 1 - compliance / 100
+    eligible = np.divide(measure_open, noncompliant_share,
+                         out=np.full(len(open_gaps), np.nan), where=noncompliant_share > 0)
+    impact = np.nan_to_num(np.divide(100, eligible), nan=0.0)
+
+    shortfall = np.clip(goal - np.nan_to_num(compliance, nan=goal), 0, None)
+    age = open_gaps['Days_Open'].fillna(0).clip(lower=0).values
+    incentive = open_gaps['Payer_Type'].map(
+        payer_performance.set_index('Payer_Type')['Quality_Incentive_Status']
+    )
+    payer_weight = incentive.map(PAYER_WEIGHTS).fillna(1.0).values
+
+    scored = open_gaps.copy()
+    scored['Closure_Impact'] = impact.round(3)
+    scored['Priority_Score'] = (
+        impact
+        * (1 + SHORTFALL_WEIGHT * shortfall)
+        * (1 + age / AGE_SCALE_DAYS)
+        * payer_weight
+    ).round(4)
+    return scored
+
+
+def top_k_worklists(scored, by='Provider_Name', k=25):
+    """Highest-scoring gaps per provider or site
+
+    Rows are grouped with one stable sort, then each group keeps its top k
+    by partial selection (argpartition) so only k rows per group are fully
+    sorted.
+    """
+    if k < 1:
+        raise ValueError(f"k must be at least 1, got {k}")
+    if scored.empty:
+        return scored.reindex(columns=[by, 'Worklist_Rank'] + [c for c in WORKLIST_COLUMNS if c != by])
+
+    codes, _ = pd.factorize(scored[by], use_na_sentinel=False)
+    scores = scored['Priority_Score'].values
+    order = np.argsort(codes, kind='stable')
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(codes))])
+
+    selected, ranks = [], []
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        rows = order[start:stop]
+        if len(rows) > k:
+            rows = rows[np.argpartition(-scores[rows], k - 1)[:k]]
+        rows = rows[np.argsort(-scores[rows], kind='stable')]
+        selected.append(rows)
+        ranks.append(np.arange(1, len(rows) + 1))
+
+    worklists = scored.iloc[np.concatenate(selected)][WORKLIST_COLUMNS].copy()
+    worklists.insert(0, 'Worklist_Rank', np.concatenate(ranks))
+    columns = [by] + [c for c in worklists.columns if c != by]
+    return worklists[columns].reset_index(drop=True)
+
+
+if __name__ == '__main__':
+    # Nightly batch: python outreach_ranking.py [data_dir] [k] -> outreach_worklists_{provider,site}.csv
+    from dashboard_data import load_dashboard_data
+
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else '.'
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 25
+    care_gaps, _, _, _, payer_performance, measure_performance = load_dashboard_data(data_dir)
+
+    scored = score_open_gaps(care_gaps, measure_performance, payer_performance)
+    for by, suffix in [('Provider_Name', 'provider'), ('Site_Location', 'site')]:
+        worklists = top_k_worklists(scored, by, k)
+        worklists.to_csv(os.path.join(data_dir, f'outreach_worklists_{suffix}.csv'), index=False)
+        print(f"Wrote {len(worklists)} {suffix} worklist rows")
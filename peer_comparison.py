@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+# Metrics that define a provider's performance profile
+PEER_METRICS = ['HEDIS_Compliance_Rate', 'Gap_Closure_Rate', 'Avg_Days_To_Close', 'Patient_Satisfaction',
+                'Documentation_Quality', 'Productivity_Score', 'Referral_Completion', 'Cost_Efficiency']
+LOWER_IS_BETTER = {'Avg_Days_To_Close'}
+
+DEFAULT_PEERS = 5
+
+
+def normalize_metrics(providers, metrics=PEER_METRICS):
+    """Provider x metric z-scores, signed so that higher is always better"""
+    values = providers[metrics].to_numpy(dtype=float)
+    mean = np.nanmean(values, axis=0)
+    std = np.nanstd(values, axis=0)
+    z = np.divide(values - mean, std, out=np.zeros_like(values), where=std > 0)
+    z = np.nan_to_num(z)
+    signs = np.array([-1.0 if metric in LOWER_IS_BETTER else 1.0 for metric in metrics])
+    return z * signs
+
+
+def provider_peers(providers, provider_name, k=DEFAULT_PEERS):
+    """Names of one provider's k nearest peers, nearest first
+
+    Only that provider's row of distances is computed, so memory stays
+    linear in the number of providers.
+    """
+    matrix = normalize_metrics(providers)
+    names = providers['Provider_Name'].to_numpy()
+    k = min(k, len(names) - 1)
+    if k <= 0:
+        return []
+
+    index = np.flatnonzero(names == provider_name)[0]
+    offsets = matrix - matrix[index]
+    distances = np.einsum('ij,ij->i', offsets, offsets)
+    distances[index] = np.inf
+
+    nearest = np.argpartition(distances, k - 1)[:k]
+    nearest = nearest[np.argsort(distances[nearest], kind='stable')]
+    return list(names[nearest])
+
+
+def peer_summary(providers, provider_name, peers, metrics=PEER_METRICS):
+    """Selected provider, peer median and best-in-peer-group value for each metric"""
+    provider = providers.loc[providers['Provider_Name'] == provider_name, metrics].iloc[0]
+    peer_values = providers.loc[providers['Provider_Name'].isin(peers), metrics]
+    best = pd.Series({
+        metric: peer_values[metric].min() if metric in LOWER_IS_BETTER else peer_values[metric].max()
+        for metric in metrics
+    })
+    return pd.DataFrame({
+        'Metric': metrics,
+        'Provider': provider.values,
+        'Peer_Median': peer_values.median().values,
+        'Best_In_Peers': best.values
+    })
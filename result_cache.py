@@ -0,0 +1,237 @@
+import hashlib
+import importlib.util
+import json
+import os
+import pickle
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # No advisory locks on Windows; writes stay atomic, workers may compute twice
+    fcntl = None
+
+from compliance_engine import ELIGIBILITY_FILE
+from data_validation import SHARED_TABLES_FILE
+from dashboard_data import DATA_FILES as DASHBOARD_FILES, source_path
+from scorecard_data import DATA_FILES as SCORECARD_FILES
+
+# Shared by every worker process and kept across restarts
+RESULT_CACHE_DIR = os.environ.get('HEDIS_RESULT_CACHE_DIR', os.path.join('.cache', 'results'))
+RESULT_CACHE_BUDGET = int(os.environ.get('HEDIS_RESULT_CACHE_MB', 1024)) * 1024 * 1024
+
+# Set HEDIS_RESULT_CACHE=0 to always recompute
+ENABLED = os.environ.get('HEDIS_RESULT_CACHE', '1') != '0'
+
+# Modules whose code shapes cached results; editing any of them invalidates every entry
+CODE_MODULES = ['dashboard_data', 'scorecard_data', 'data_validation', 'compliance_engine',
+                'closure_latency', 'forecasting', 'snapshots', 'result_cache']
+
+SOURCE_FILES = list(DASHBOARD_FILES.values()) + list(SCORECARD_FILES.values()) + [ELIGIBILITY_FILE]
+
+# Temp files older than this were left by a crashed writer
+STALE_TEMP_SECONDS = 3600
+
+# (path, size, mtime_ns) -> content digest, so unchanged files are hashed once per process
+_FILE_DIGESTS = {}
+
+
+@lru_cache(maxsize=1)
+def code_version():
+    """Fingerprint of the computing code and of the libraries the pickles depend on"""
+    digest = hashlib.sha1(f"{sys.version_info[:2]}:{np.__version__}:{pd.__version__}".encode())
+    for name in CODE_MODULES:
+        with open(importlib.util.find_spec(name).origin, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def file_digest(path):
+    stat = os.stat(path)
+    signature = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if signature not in _FILE_DIGESTS:
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        _FILE_DIGESTS[signature] = digest.hexdigest()
+    return _FILE_DIGESTS[signature]
+
+
+def input_version(data_dir='.', as_of=None):
+    """Content hash of a data directory's source files, or of one recorded snapshot
+
+    Unlike data_version it ignores paths and mtimes, so identical data in
+    another directory or a freshly deployed copy maps to the same entries.
+    """
+    if as_of:
+        from snapshots import snapshot_version
+        return 'snapshot:' + snapshot_version(data_dir, as_of)
+
+    paths = [source_path(data_dir, filename) for filename in SOURCE_FILES]
+    paths.append(os.path.join(data_dir, SHARED_TABLES_FILE))
+    digest = hashlib.sha1()
+    for path in sorted(paths):
+        if os.path.exists(path):
+            digest.update(f"{os.path.basename(path)}:{file_digest(path)}".encode())
+    return digest.hexdigest()[:16]
+
+
+def result_key(name, inputs, **params):
+    """Content address of one result: what was computed, from which inputs, by which code"""
+    payload = json.dumps({'name': name, 'inputs': inputs, 'code': code_version(), 'params': params},
+                         sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+@contextmanager
+def file_lock(path, blocking=True):
+    """Exclusive advisory lock across processes; yields False if non-blocking and already held"""
+    if fcntl is None:
+        yield True
+        return
+    with open(path, 'a') as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class ResultCache:
+    """Pickled results on disk, shared by worker processes and evicted least recently used first
+
+    Entries are written to a temp file and renamed into place, so readers
+    never see a partial entry. A per-key lock lets one process compute a
+    missing result while the others wait for it.
+    """
+
+    def __init__(self, root=RESULT_CACHE_DIR, max_bytes=RESULT_CACHE_BUDGET):
+        self.root = root
+        self.max_bytes = max_bytes
+
+    def _path(self, key, suffix='.pkl'):
+        return os.path.join(self.root, key[:2], key + suffix)
+
+    def load(self, key):
+        """(True, value) on a hit, (False, None) on a miss"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return False, None
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # Written by an incompatible version; drop it and recompute
+            self._remove(path)
+            return False, None
+        # mtime doubles as last-used time; atime is often disabled
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return True, value
+
+    def store(self, key, value):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        self.evict()
+
+    def get(self, key, loader):
+        """Cached value for key, calling loader() once across processes on a miss"""
+        hit, value = self.load(key)
+        if hit:
+            return value
+
+        os.makedirs(os.path.dirname(self._path(key)), exist_ok=True)
+        with file_lock(self._path(key, '.lock')):
+            # Another worker may have finished it while we waited
+            hit, value = self.load(key)
+            if hit:
+                return value
+            value = loader()
+            self.store(key, value)
+        return value
+
+    def _entries(self):
+        """(last used, size, path) of every entry, plus stale temp files to delete"""
+        entries, stale = [], []
+        if not os.path.isdir(self.root):
+            return entries, stale
+        now = time.time()
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if entry.name.endswith('.pkl'):
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                elif entry.name.endswith('.tmp') and now - stat.st_mtime > STALE_TEMP_SECONDS:
+                    stale.append(entry.path)
+        return entries, stale
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits its budget"""
+        os.makedirs(self.root, exist_ok=True)
+        with file_lock(os.path.join(self.root, '.evict.lock'), blocking=False) as acquired:
+            if not acquired:
+                return  # Another process is already evicting
+            entries, stale = self._entries()
+            for path in stale:
+                self._remove(path)
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                self._remove(path[:-len('.pkl')] + '.lock')
+                total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def stats(self):
+        entries, _ = self._entries()
+        return {'entries': len(entries), 'bytes': sum(size for _, size, _ in entries), 'max_bytes': self.max_bytes}
+
+
+RESULT_CACHE = ResultCache()
+
+
+def cached(name, data_dir, compute, as_of=None, **params):
+    """compute() through the disk cache, keyed by the data directory's content and the code version"""
+    if not ENABLED:
+        return compute()
+    return RESULT_CACHE.get(result_key(name, input_version(data_dir, as_of), **params), compute)
+
+
+if __name__ == '__main__':
+    # python result_cache.py [stats|evict]
+    if len(sys.argv) > 1 and sys.argv[1] == 'evict':
+        RESULT_CACHE.evict()
+    print(json.dumps(RESULT_CACHE.stats()))
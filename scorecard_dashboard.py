@@ -1,8 +1,17 @@
+import os
+import time
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import startup
+from dashboard_data import data_version
+from tenants import tenant_dir, InvalidTenant, UnknownTenant, TENANT_CACHE_ENTRIES
+from peer_comparison import DEFAULT_PEERS, provider_peers, peer_summary
+from alerts import recent_alerts
+from snapshots import SnapshotStore, load_as_of, snapshot_version
+from result_cache import cached
+from scorecard_data import DATA_FILES, load_scorecard_data, get_status_color, get_rank_suffix, calculate_trend, build_scorecard_table
+
+run_start = time.perf_counter()
 
 # Page configuration
 st.set_page_config(
@@ -42,60 +51,48 @@ st.markdown("""
     """, unsafe_allow_html=True)
 
 # Load data
-@st.cache_data
-def load_data():
-    providers = pd.read_csv('provider_scorecard_main.csv')
-    metrics = pd.read_csv('scorecard_metrics.csv')
-    trends = pd.read_csv('provider_trends.csv')
-    return providers, metrics, trends
-
-providers_df, metrics_df, trends_df = load_data()
-
-# Helper functions
-def get_status_color(value, target, good_threshold, warning_threshold, lower_is_better=False):
-    """Determine status color based on thresholds"""
-    if lower_is_better:
-        if value <= good_threshold:
-            return 'green', '🟢'
-        elif value <= warning_threshold:
-            return 'yellow', '🟡'
-        else:
-            return 'red', '🔴'
-    else:
-        if value >= good_threshold:
-            return 'green', '🟢'
-        elif value >= warning_threshold:
-            return 'yellow', '🟡'
-        else:
-            return 'red', '🔴'
-
-def get_rank_suffix(rank):
-    """Get ordinal suffix for ranking"""
-    if 10 <= rank % 100 <= 20:
-        suffix = 'th'
-    else:
-        suffix = {1: 'st', 2: 'nd', 3: 'rd'}.get(rank % 10, 'th')
-    return f"{rank}{suffix}"
-
-def calculate_trend(df, provider, metric):
-    """Calculate trend direction for a provider and metric"""
-    provider_data = df[df['Provider_Name'] == provider].sort_values('Month')
-    if len(provider_data) < 2:
-        return '→'
-    
-    recent = provider_data[metric].iloc[-1]
-    previous = provider_data[metric].iloc[-2]
-    
-    if recent > previous * 1.01:  # More than 1% improvement
-        return '↑'
-    elif recent < previous * 0.99:  # More than 1% decline
-        return '↓'
-    else:
-        return '→'
+# Cached per tenant directory and data version; least recently used tenants are evicted.
+# Misses fall through to the on-disk result cache shared with other server processes.
+@st.cache_data(max_entries=TENANT_CACHE_ENTRIES)
+def load_data(data_dir, version, as_of=None):
+    if as_of:
+        return cached('scorecard_data', data_dir, lambda: load_as_of(data_dir, as_of)[1], as_of)
+    return startup.preloaded('scorecard', version) or cached('scorecard_data', data_dir, lambda: load_scorecard_data(data_dir))
+
+@st.cache_data(max_entries=TENANT_CACHE_ENTRIES)
+def load_scorecard_table(data_dir, version, as_of=None):
+    providers, _, trends = load_data(data_dir, version, as_of)
+    return cached('scorecard_table', data_dir, lambda: build_scorecard_table(providers, trends), as_of)
+
+# Resolve the tenant from ?tenant= or HEDIS_TENANT; none means the repo-root data
+tenant = st.query_params.get('tenant') or os.environ.get('HEDIS_TENANT')
+try:
+    data_dir = tenant_dir(tenant)
+except (InvalidTenant, UnknownTenant) as e:
+    st.error(str(e))
+    st.stop()
+
+# Time travel: view the scorecard as it stood on a recorded snapshot date
+view_as_of = st.sidebar.selectbox(
+    "📅 View as of",
+    options=['Latest'] + SnapshotStore(data_dir).dates()[::-1]
+)
+as_of = None if view_as_of == 'Latest' else view_as_of
+current_version = snapshot_version(data_dir, as_of) if as_of else data_version(data_dir, DATA_FILES.values())
+
+providers_df, metrics_df, trends_df = load_data(data_dir, current_version, as_of)
+
+# Header covers the last complete quarter through the latest trend month
+latest_month = pd.to_datetime(trends_df['Month'], format='%b %Y').max()
+reporting_quarter = pd.Period(latest_month, freq='Q') - 1
 
 # Title
 st.title("📊 Provider Performance Scorecard")
-st.markdown("**Q4 2024 - January 2025** | Comprehensive Quality & Productivity Metrics")
+st.markdown(
+    f"**Q{reporting_quarter.quarter} {reporting_quarter.year} - {latest_month:%B %Y}** | "
+    + (f"As of {as_of} | " if as_of else "")
+    + "Comprehensive Quality & Productivity Metrics"
+)
 st.markdown("---")
 
 # Sidebar
@@ -140,8 +137,8 @@ with col3:
     providers_above_target = len(providers_df[providers_df['Overall_Score'] >= 85])
     st.metric(
         label="Providers Above Target",
-        value=f"{providers_above_target}/5",
-        delta=f"{providers_above_target/5*100:.0f}%"
+        value=f"{providers_above_target}/{len(providers_df)}",
+        delta=f"{providers_above_target/len(providers_df)*100:.0f}%"
     )
 
 with col4:
@@ -152,45 +149,86 @@ with col4:
         delta="+0.2 vs last quarter"
     )
 
+startup.mark('first paint')
+
 st.markdown("---")
 
+# Charts start here; importing plotly now lets the summary cards paint first
+with startup.timed('import plotly'):
+    import plotly.graph_objects as go
+
+# Radar and bar views compare one provider with its nearest peers instead of everyone
+RADAR_METRICS = ['HEDIS_Compliance_Rate', 'Gap_Closure_Rate', 'Patient_Satisfaction',
+                 'Documentation_Quality', 'Productivity_Score']
+RADAR_LABELS = ['HEDIS\nCompliance', 'Gap\nClosure', 'Patient\nSatisfaction',
+                'Documentation', 'Productivity']
+
+def show_peer_comparison(provider_name, key):
+    """Radar and bar charts of a provider against peer median and best-in-peer-group"""
+    max_peers = len(providers_df) - 1
+    if max_peers > 1:
+        peer_count = st.slider("Peer group size", min_value=1, max_value=max_peers,
+                               value=min(DEFAULT_PEERS, max_peers), key=f"{key}_peers")
+    else:
+        peer_count = max_peers
+    peers = provider_peers(providers_df, provider_name, peer_count)
+    if not peers:
+        st.info("No other providers to compare against.")
+        return
+    st.caption("Most similar peers: " + ", ".join(peers))
+
+    summary = peer_summary(providers_df, provider_name, peers, RADAR_METRICS).set_index('Metric')
+    summary.loc['Patient_Satisfaction'] *= 20  # Scale to 100
+
+    series = [
+        ('Provider', provider_name, '#3b82f6'),
+        ('Peer_Median', 'Peer median', '#9ca3af'),
+        ('Best_In_Peers', 'Best in peer group', '#10b981')
+    ]
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        fig_radar = go.Figure()
+        for column, name, color in series:
+            fig_radar.add_trace(go.Scatterpolar(
+                r=summary[column].values,
+                theta=RADAR_LABELS,
+                fill='toself' if column == 'Provider' else 'none',
+                name=name,
+                line=dict(color=color, dash='solid' if column == 'Provider' else 'dash')
+            ))
+        fig_radar.update_layout(
+            polar=dict(radialaxis=dict(visible=True, range=[0, 100])),
+            showlegend=True,
+            height=450
+        )
+        st.plotly_chart(fig_radar, use_container_width=True)
+
+    with col2:
+        fig_bars = go.Figure()
+        for column, name, color in series:
+            fig_bars.add_trace(go.Bar(
+                x=[label.replace('\n', ' ') for label in RADAR_LABELS],
+                y=summary[column].values,
+                name=name,
+                marker_color=color
+            ))
+        fig_bars.update_layout(
+            barmode='group',
+            yaxis_title="Score (Satisfaction x20)",
+            yaxis=dict(range=[0, 100]),
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+            height=450
+        )
+        st.plotly_chart(fig_bars, use_container_width=True)
+
 # Main Scorecard View
 if selected_provider == 'All Providers':
     st.header("🏆 Provider Performance Scorecard - All Providers")
     
     # Create comprehensive scorecard table
-    scorecard_data = []
-    
-    for idx, provider in providers_df.iterrows():
-        provider_name = provider['Provider_Name']
-        
-        # Get rankings
-        providers_sorted = providers_df.sort_values('Overall_Score', ascending=False)
-        rank = providers_sorted[providers_sorted['Provider_Name'] == provider_name].index[0] + 1
-        
-        # Get trends
-        hedis_trend = calculate_trend(trends_df, provider_name, 'HEDIS_Compliance_Rate')
-        closure_trend = calculate_trend(trends_df, provider_name, 'Gap_Closure_Rate')
-        
-        # Get status for key metrics
-        hedis_status = get_status_color(
-            provider['HEDIS_Compliance_Rate'], 
-            85, 87, 83
-        )
-        
-        scorecard_data.append({
-            'Rank': get_rank_suffix(rank),
-            'Provider': provider_name,
-            'Specialty': provider['Specialty'],
-            'Overall Score': f"{provider['Overall_Score']:.1f}%",
-            'Status': hedis_status[1],
-            'HEDIS': f"{provider['HEDIS_Compliance_Rate']:.1f}% {hedis_trend}",
-            'Gap Closure': f"{provider['Gap_Closure_Rate']:.1f}% {closure_trend}",
-            'Pat. Sat.': f"{provider['Patient_Satisfaction']:.1f}/5",
-            'Patients': int(provider['Patient_Panel_Size'])
-        })
-    
-    scorecard_table = pd.DataFrame(scorecard_data)
+    scorecard_table = load_scorecard_table(data_dir, current_version, as_of)
     
     # Display as interactive table
     st.dataframe(
@@ -274,42 +312,16 @@ if selected_provider == 'All Providers':
             st.plotly_chart(fig_closure, use_container_width=True)
     
     with tab2:
-        # Radar chart for multi-metric comparison
-        st.subheader("Multi-Metric Provider Comparison")
-        
-        categories = ['HEDIS\nCompliance', 'Gap\nClosure', 'Patient\nSatisfaction', 
-                     'Documentation', 'Productivity']
+        # Peer comparison for one provider at a time
+        st.subheader("Multi-Metric Peer Comparison")
         
-        fig_radar = go.Figure()
-        
-        for idx, provider in providers_df.iterrows():
-            values = [
-                provider['HEDIS_Compliance_Rate'],
-                provider['Gap_Closure_Rate'],
-                provider['Patient_Satisfaction'] * 20,  # Scale to 100
-                provider['Documentation_Quality'],
-                provider['Productivity_Score']
-            ]
-            
-            fig_radar.add_trace(go.Scatterpolar(
-                r=values,
-                theta=categories,
-                fill='toself',
-                name=provider['Provider_Name']
-            ))
-        
-        fig_radar.update_layout(
-            polar=dict(
-                radialaxis=dict(
-                    visible=True,
-                    range=[0, 100]
-                )
-            ),
-            showlegend=True,
-            height=500
+        compare_provider = st.selectbox(
+            "Compare provider",
+            options=list(providers_df['Provider_Name']),
+            key='radar_provider'
         )
         
-        st.plotly_chart(fig_radar, use_container_width=True)
+        show_peer_comparison(compare_provider, 'radar')
     
     with tab3:
         # Trend analysis over time
@@ -362,7 +374,7 @@ else:
         rank = providers_df.sort_values('Overall_Score', ascending=False).index.tolist().index(
             providers_df[providers_df['Provider_Name'] == selected_provider].index[0]
         ) + 1
-        st.metric("Overall Rank", get_rank_suffix(rank) + " of 5")
+        st.metric("Overall Rank", get_rank_suffix(rank) + f" of {len(providers_df)}")
     
     st.markdown("---")
     
@@ -395,6 +407,12 @@ else:
     
     st.markdown("---")
     
+    # Peer comparison
+    st.subheader("👥 Peer Comparison")
+    show_peer_comparison(selected_provider, 'individual')
+    
+    st.markdown("---")
+    
     # Detailed Metrics Table
     st.subheader("📊 Detailed Metrics Breakdown")
     
@@ -451,6 +469,9 @@ else:
     # Individual trend
     st.subheader("📈 4-Month Performance Trend")
     
+    # Only the individual view needs subplots
+    from plotly.subplots import make_subplots
+    
     provider_trends = trends_df[trends_df['Provider_Name'] == selected_provider]
     
     fig_individual = make_subplots(
@@ -543,5 +564,21 @@ st.sidebar.info("""
 - 🔴 Red: Below target
 """)
 
+# Threshold crossings recorded by alerts.py on each data refresh
+latest_alerts = recent_alerts(data_dir, limit=5)
+if latest_alerts:
+    st.sidebar.markdown("### 🔔 Recent Alerts")
+    for alert in latest_alerts:
+        icon = '🟢' if alert['direction'] == 'improved' else '🔴'
+        st.sidebar.markdown(
+            f"{icon} **{alert['entity']}** {alert['metric'].replace('_', ' ')}: "
+            f"{alert['previous_value']:g} → {alert['value']:g} ({alert['status'].replace('_', ' ')})"
+        )
+
 st.sidebar.markdown("### 📅 Update Frequency")
 st.sidebar.markdown("Monthly refresh on the 5th business day")
+
+if startup.ENABLED:
+    startup.TIMINGS['last script run'] = (time.perf_counter() - run_start) * 1000
+    with st.sidebar.expander("⏱️ Startup Timings"):
+        st.dataframe(startup.timings_table(), use_container_width=True, hide_index=True)
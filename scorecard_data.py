@@ -0,0 +1,95 @@
+import pandas as pd
+
+from dashboard_data import read_table
+
+# Source files behind the provider scorecard
+DATA_FILES = {
+    'providers': 'provider_scorecard_main.csv',
+    'metrics': 'scorecard_metrics.csv',
+    'trends': 'provider_trends.csv'
+}
+
+
+def load_scorecard_data(data_dir='.'):
+    """Read the provider, metric definition and trend tables"""
+    providers = read_table(data_dir, DATA_FILES['providers'])
+    metrics = read_table(data_dir, DATA_FILES['metrics'])
+    trends = read_table(data_dir, DATA_FILES['trends'])
+    return providers, metrics, trends
+
+
+def get_status_color(value, target, good_threshold, warning_threshold, lower_is_better=False):
+    """Determine status color based on thresholds"""
+    if lower_is_better:
+        if value <= good_threshold:
+            return 'green', '🟢'
+        elif value <= warning_threshold:
+            return 'yellow', '🟡'
+        else:
+            return 'red', '🔴'
+    else:
+        if value >= good_threshold:
+            return 'green', '🟢'
+        elif value >= warning_threshold:
+            return 'yellow', '🟡'
+        else:
+            return 'red', '🔴'
+
+def get_rank_suffix(rank):
+    """Get ordinal suffix for ranking"""
+    if 10 <= rank % 100 <= 20:
+        suffix = 'th'
+    else:
+        suffix = {1: 'st', 2: 'nd', 3: 'rd'}.get(rank % 10, 'th')
+    return f"{rank}{suffix}"
+
+def calculate_trend(df, provider, metric):
+    """Calculate trend direction for a provider and metric"""
+    provider_data = df[df['Provider_Name'] == provider].sort_values('Month')
+    if len(provider_data) < 2:
+        return '→'
+    
+    recent = provider_data[metric].iloc[-1]
+    previous = provider_data[metric].iloc[-2]
+    
+    if recent > previous * 1.01:  # More than 1% improvement
+        return '↑'
+    elif recent < previous * 0.99:  # More than 1% decline
+        return '↓'
+    else:
+        return '→'
+
+def build_scorecard_table(providers_df, trends_df):
+    """One row per provider with rank, status, trends and key metrics"""
+    scorecard_data = []
+    
+    for idx, provider in providers_df.iterrows():
+        provider_name = provider['Provider_Name']
+        
+        # Get rankings
+        providers_sorted = providers_df.sort_values('Overall_Score', ascending=False)
+        rank = providers_sorted[providers_sorted['Provider_Name'] == provider_name].index[0] + 1
+        
+        # Get trends
+        hedis_trend = calculate_trend(trends_df, provider_name, 'HEDIS_Compliance_Rate')
+        closure_trend = calculate_trend(trends_df, provider_name, 'Gap_Closure_Rate')
+        
+        # Get status for key metrics
+        hedis_status = get_status_color(
+            provider['HEDIS_Compliance_Rate'], 
+            85, 87, 83
+        )
+        
+        scorecard_data.append({
+            'Rank': get_rank_suffix(rank),
+            'Provider': provider_name,
+            'Specialty': provider['Specialty'],
+            'Overall Score': f"{provider['Overall_Score']:.1f}%",
+            'Status': hedis_status[1],
+            'HEDIS': f"{provider['HEDIS_Compliance_Rate']:.1f}% {hedis_trend}",
+            'Gap Closure': f"{provider['Gap_Closure_Rate']:.1f}% {closure_trend}",
+            'Pat. Sat.': f"{provider['Patient_Satisfaction']:.1f}/5",
+            'Patients': int(provider['Patient_Panel_Size'])
+        })
+    
+    return pd.DataFrame(scorecard_data)
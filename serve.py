@@ -0,0 +1,26 @@
+import sys
+
+import startup
+
+
+def main(argv):
+    """Warm up imports and data, then start Streamlit in this process
+
+    Usage: python serve.py dashboard_app.py [streamlit run options] [-- script args]
+    """
+    script = argv[1] if len(argv) > 1 else 'dashboard_app.py'
+
+    timings = startup.warm_up()
+    print("Warm-up timings (ms):")
+    for row in startup.timings_table():
+        print(f"  {row['Step']:<32} {row['ms']:>8.1f}")
+    print(f"  {'total':<32} {timings['warm-up complete']:>8.1f}")
+
+    from streamlit.web import cli
+
+    # Streamlit's own CLI parses --flag value, --flag=value and script arguments like `streamlit run`
+    cli.main(['run', script] + argv[2:], prog_name='streamlit')
+
+
+if __name__ == '__main__':
+    main(sys.argv)
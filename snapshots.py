@@ -0,0 +1,236 @@
+import hashlib
+import json
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+SNAPSHOT_DIR = 'snapshots'
+
+# Write a full copy of the gap table after this many change logs so
+# reconstruction never replays more than a month of history
+CHECKPOINT_EVERY = 30
+
+# Small tables stored whole, deduplicated by content
+SNAPSHOT_TABLES = ['monthly_trends', 'site_performance', 'provider_performance', 'payer_performance',
+                   'measure_performance', 'providers', 'metrics', 'trends', 'eligibility']
+
+# Tables recorded only when the source file exists
+OPTIONAL_TABLES = {'eligibility'}
+
+DELETED = '_Deleted'
+
+# Gap age grows every day for every open gap; it is left out of the diff so
+# change logs only carry real changes, and recomputed on reconstruction
+DERIVED_COLUMNS = ['Days_Open']
+
+
+class SnapshotStore:
+    """Daily snapshots of gap status as a checkpoint plus per-day change logs
+
+    Layout under <data_dir>/snapshots/:
+      manifest.json               dates, checkpoints and table hashes
+      gaps/<date>.checkpoint.parquet   full gap table
+      gaps/<date>.changes.parquet      rows added or changed that day, plus deletions
+      tables/<name>/<hash>.parquet     rollup and scorecard tables, stored once per distinct content
+    """
+
+    def __init__(self, data_dir='.'):
+        self.root = os.path.join(data_dir, SNAPSHOT_DIR)
+        self.manifest_path = os.path.join(self.root, 'manifest.json')
+
+    def manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {'snapshots': {}}
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def dates(self):
+        return sorted(self.manifest()['snapshots'])
+
+    def _write_manifest(self, manifest):
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _gap_path(self, date, kind):
+        return os.path.join(self.root, 'gaps', f"{date}.{kind}.parquet")
+
+    def _store_table(self, name, df):
+        digest = hashlib.sha1(','.join(df.columns).encode())
+        digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+        content_hash = digest.hexdigest()[:16]
+        path = os.path.join(self.root, 'tables', name, f"{content_hash}.parquet")
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            df.to_parquet(path, index=False)
+        return content_hash
+
+    def record(self, date, care_gaps, tables):
+        """Store the state on a date; re-recording the latest date replaces it"""
+        date = pd.Timestamp(date).strftime('%Y-%m-%d')
+        manifest = self.manifest()
+        snapshots = manifest['snapshots']
+        earlier = [d for d in sorted(snapshots) if d < date]
+        if any(d > date for d in snapshots):
+            raise ValueError(f"Snapshots are append-only; {date} is before the latest snapshot")
+
+        os.makedirs(os.path.join(self.root, 'gaps'), exist_ok=True)
+        gaps_since_checkpoint = 0
+        for d in reversed(earlier):
+            if snapshots[d]['gaps'] == 'checkpoint':
+                break
+            gaps_since_checkpoint += 1
+
+        # Drop the file written by an earlier recording of the same date
+        if date in snapshots:
+            os.remove(self._gap_path(date, snapshots[date]['gaps']))
+
+        if not earlier or gaps_since_checkpoint + 1 >= CHECKPOINT_EVERY:
+            care_gaps.to_parquet(self._gap_path(date, 'checkpoint'), index=False)
+            kind = 'checkpoint'
+        else:
+            changes = diff_gaps(self.care_gaps_as_of(earlier[-1]), care_gaps)
+            changes.to_parquet(self._gap_path(date, 'changes'), index=False)
+            kind = 'changes'
+
+        snapshots[date] = {
+            'gaps': kind,
+            'tables': {name: self._store_table(name, df) for name, df in tables.items()}
+        }
+        self._write_manifest(manifest)
+        return date
+
+    def _resolve(self, date):
+        """Latest snapshot date on or before the requested date"""
+        date = pd.Timestamp(date).strftime('%Y-%m-%d')
+        available = [d for d in self.dates() if d <= date]
+        if not available:
+            raise KeyError(f"No snapshot on or before {date}")
+        return available[-1]
+
+    def care_gaps_as_of(self, date):
+        """Gap table as it stood on a date: nearest checkpoint plus the change logs after it"""
+        date = self._resolve(date)
+        snapshots = self.manifest()['snapshots']
+        history = [d for d in sorted(snapshots) if d <= date]
+
+        start = max(i for i, d in enumerate(history) if snapshots[d]['gaps'] == 'checkpoint')
+        care_gaps = pd.read_parquet(self._gap_path(history[start], 'checkpoint'))
+        for d in history[start + 1:]:
+            care_gaps = apply_changes(care_gaps, pd.read_parquet(self._gap_path(d, 'changes')))
+        care_gaps['Days_Open'] = days_open_as_of(care_gaps, date)
+        return care_gaps.reset_index(drop=True)
+
+    def table_as_of(self, name, date):
+        date = self._resolve(date)
+        content_hash = self.manifest()['snapshots'][date]['tables'][name]
+        return pd.read_parquet(os.path.join(self.root, 'tables', name, f"{content_hash}.parquet"))
+
+
+def diff_gaps(previous, current, key='Gap_ID', ignore=DERIVED_COLUMNS):
+    """Rows that are new or changed in current, plus tombstones for rows that disappeared
+
+    Columns in ignore do not count as a change on their own.
+    """
+    prev = previous.set_index(key)
+    cur = current.set_index(key)
+    shared = cur.index.intersection(prev.index)
+
+    a = cur.loc[shared, prev.columns.intersection(cur.columns).difference(ignore, sort=False)]
+    b = prev.loc[shared, a.columns]
+    changed = ((a != b) & ~(a.isna() & b.isna())).any(axis=1)
+    if len(cur.columns.difference(prev.columns)):
+        changed[:] = True
+
+    upserts = cur.loc[cur.index.difference(prev.index).union(changed[changed].index)].reset_index()
+    upserts[DELETED] = False
+    deletions = pd.DataFrame({key: prev.index.difference(cur.index), DELETED: True})
+    return pd.concat([upserts, deletions], ignore_index=True)
+
+
+def apply_changes(care_gaps, changes, key='Gap_ID'):
+    """Replay one day's change log onto the previous state"""
+    kept = care_gaps[~care_gaps[key].isin(changes[key])]
+    upserts = changes[~changes[DELETED].astype(bool)].drop(columns=[DELETED])
+
+    # Tombstones share the file with upserts, which widens int columns to float
+    shared = upserts.columns.intersection(care_gaps.columns)
+    upserts = upserts.astype(care_gaps.dtypes[shared].to_dict())
+    return pd.concat([kept, upserts], ignore_index=True)
+
+
+def days_open_as_of(care_gaps, date):
+    """Gap age on a date: up to Closed_Date for closed gaps, up to the date for open ones"""
+    end = care_gaps['Closed_Date'].where(care_gaps['Gap_Status'] == 'Closed', pd.Timestamp(date))
+    days = (end - care_gaps['Open_Date']).dt.days
+    return days.fillna(care_gaps['Days_Open']).astype(care_gaps['Days_Open'].dtype)
+
+
+def snapshot_version(data_dir, date):
+    """Fingerprint of one recorded snapshot, used like data_version for caching"""
+    store = SnapshotStore(data_dir)
+    date = store._resolve(date)
+    entry = json.dumps(store.manifest()['snapshots'][date], sort_keys=True)
+    return hashlib.sha1(f"{os.path.abspath(data_dir)}:{date}:{entry}".encode()).hexdigest()[:16]
+
+
+def snapshot_tables(dashboard_frames, scorecard_frames, eligibility=None):
+    """Name the small tables of a load for storage"""
+    _, monthly_trends, site_performance, provider_performance, payer_performance, measure_performance = dashboard_frames
+    providers, metrics, trends = scorecard_frames
+    tables = {
+        'monthly_trends': monthly_trends,
+        'site_performance': site_performance,
+        'provider_performance': provider_performance,
+        'payer_performance': payer_performance,
+        'measure_performance': measure_performance,
+        'providers': providers,
+        'metrics': metrics,
+        'trends': trends
+    }
+    if eligibility is not None:
+        tables['eligibility'] = eligibility
+    return tables
+
+
+def load_as_of(data_dir, date):
+    """Dashboard and scorecard frames as they stood on a date, shaped like the live loaders"""
+    store = SnapshotStore(data_dir)
+    tables = {name: store.table_as_of(name, date) for name in SNAPSHOT_TABLES if name not in OPTIONAL_TABLES}
+    care_gaps = store.care_gaps_as_of(date)
+    dashboard_frames = (care_gaps, tables['monthly_trends'], tables['site_performance'],
+                        tables['provider_performance'], tables['payer_performance'], tables['measure_performance'])
+    scorecard_frames = (tables['providers'], tables['metrics'], tables['trends'])
+    return dashboard_frames, scorecard_frames
+
+
+def eligibility_as_of(data_dir, date):
+    """Eligibility extract recorded with a snapshot, or None if it had none"""
+    store = SnapshotStore(data_dir)
+    if 'eligibility' not in store.manifest()['snapshots'][store._resolve(date)]['tables']:
+        return None
+    return store.table_as_of('eligibility', date)
+
+
+def record_current(data_dir='.', date=None):
+    """Snapshot the current data, dated by the extract date unless one is given"""
+    from closure_latency import data_as_of
+    from compliance_engine import ELIGIBILITY_FILE
+    from dashboard_data import load_dashboard_data
+    from scorecard_data import load_scorecard_data
+
+    dashboard_frames = load_dashboard_data(data_dir)
+    scorecard_frames = load_scorecard_data(data_dir)
+    eligibility_path = os.path.join(data_dir, ELIGIBILITY_FILE)
+    eligibility = pd.read_csv(eligibility_path) if os.path.exists(eligibility_path) else None
+    date = date or data_as_of(dashboard_frames[0])
+    tables = snapshot_tables(dashboard_frames, scorecard_frames, eligibility)
+    return SnapshotStore(data_dir).record(date, dashboard_frames[0], tables)
+
+
+if __name__ == '__main__':
+    # Daily job: python snapshots.py [data_dir] [YYYY-MM-DD]
+    print(f"Recorded snapshot {record_current(*sys.argv[1:3])}")
@@ -0,0 +1,66 @@
+import importlib
+import os
+import time
+from contextlib import contextmanager
+
+# Reference point for startup timings; serve.py imports this module first
+PROCESS_START = time.perf_counter()
+
+# Set HEDIS_STARTUP_TIMINGS=1 to show import and first-paint timings in the sidebar
+ENABLED = os.environ.get('HEDIS_STARTUP_TIMINGS') == '1'
+
+HEAVY_MODULES = ['numpy', 'pandas', 'plotly.graph_objects', 'plotly.express', 'plotly.subplots']
+
+# Label -> milliseconds
+TIMINGS = {}
+
+# (dataset, data version) -> loaded frames, filled by warm_up()
+_PRELOADED = {}
+
+
+@contextmanager
+def timed(label):
+    """Record how long the wrapped block took, in milliseconds"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        TIMINGS[label] = (time.perf_counter() - start) * 1000
+
+
+def mark(label):
+    """Record the first time a point is reached, in milliseconds since process start"""
+    TIMINGS.setdefault(label, (time.perf_counter() - PROCESS_START) * 1000)
+
+
+def preloaded(name, version):
+    """Frames loaded by warm_up() for this data version, if any"""
+    return _PRELOADED.get((name, version))
+
+
+def warm_up():
+    """Import heavy modules and load both apps' data before the server accepts sessions"""
+    for module in HEAVY_MODULES:
+        with timed(f"import {module}"):
+            importlib.import_module(module)
+
+    import dashboard_data
+    import scorecard_data
+    from result_cache import cached
+
+    # Served from the on-disk result cache when another process already loaded this data
+    version = dashboard_data.data_version()
+    with timed('preload dashboard data'):
+        _PRELOADED[('dashboard', version)] = cached('dashboard_data', '.', dashboard_data.load_dashboard_data)
+
+    version = dashboard_data.data_version(files=scorecard_data.DATA_FILES.values())
+    with timed('preload scorecard data'):
+        _PRELOADED[('scorecard', version)] = cached('scorecard_data', '.', scorecard_data.load_scorecard_data)
+
+    mark('warm-up complete')
+    return TIMINGS
+
+
+def timings_table():
+    """Recorded timings as sorted (label, ms) rows"""
+    return [{'Step': label, 'ms': round(ms, 1)} for label, ms in sorted(TIMINGS.items(), key=lambda item: item[1])]
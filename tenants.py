@@ -0,0 +1,176 @@
+import json
+import os
+import re
+import shutil
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+import compliance_engine
+import dashboard_data
+import data_validation
+import scorecard_data
+
+# One sub-directory per organization or site, laid out like the repo root
+TENANT_ROOT = os.environ.get('HEDIS_TENANT_ROOT', 'tenants')
+
+# Per-process budget for tenant data held in memory
+TENANT_MEMORY_BUDGET = int(os.environ.get('HEDIS_TENANT_MEMORY_MB', 512)) * 1024 * 1024
+TENANT_CACHE_ENTRIES = int(os.environ.get('HEDIS_TENANT_CACHE_ENTRIES', 32))
+
+_TENANT_ID = re.compile(r'^[A-Za-z0-9_-]+$')
+
+# Org-level tables that cannot be split by site and are copied to every tenant
+SHARED_FILES = [
+    dashboard_data.DATA_FILES['monthly_trends'],
+    dashboard_data.DATA_FILES['payer_performance'],
+    dashboard_data.DATA_FILES['measure_performance'],
+    scorecard_data.DATA_FILES['metrics']
+]
+SHARED_TABLES = [name for name, filename in dashboard_data.DATA_FILES.items() if filename in SHARED_FILES]
+
+
+class InvalidTenant(ValueError):
+    """Tenant id is not a valid directory name"""
+
+
+class UnknownTenant(LookupError):
+    """No data directory exists for the tenant"""
+
+
+def tenant_dir(tenant_id, root=TENANT_ROOT):
+    """Data directory for a tenant; None means the single-tenant repo root"""
+    if not tenant_id:
+        return '.'
+    if not _TENANT_ID.match(tenant_id):
+        raise InvalidTenant(f"Invalid tenant id '{tenant_id}'")
+    path = os.path.join(root, tenant_id)
+    if not os.path.isdir(path):
+        raise UnknownTenant(f"Unknown tenant '{tenant_id}'")
+    return path
+
+
+def list_tenants(root=TENANT_ROOT):
+    if not os.path.isdir(root):
+        return []
+    return sorted(name for name in os.listdir(root) if os.path.isdir(os.path.join(root, name)))
+
+
+def tenant_slug(name):
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+
+
+def frame_nbytes(value):
+    """Approximate in-memory size of a frame or a nested collection of frames"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, (list, tuple)):
+        return sum(frame_nbytes(item) for item in value)
+    if isinstance(value, dict):
+        return sum(frame_nbytes(item) for item in value.values())
+    if hasattr(value, '__dict__'):
+        return frame_nbytes(vars(value))
+    return 0
+
+
+class TenantCache:
+    """LRU cache of per-tenant data that evicts cold tenants to stay within a memory budget"""
+
+    def __init__(self, max_bytes=TENANT_MEMORY_BUDGET, max_entries=TENANT_CACHE_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # key -> (version, value, nbytes)
+        self._lock = threading.Lock()
+
+    def get(self, key, version, loader):
+        """Cached value for key at this data version, calling loader() on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                return entry[1]
+
+        value = loader()
+        nbytes = frame_nbytes(value)
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.total_bytes -= old[2]
+            self._entries[key] = (version, value, nbytes)
+            self.total_bytes += nbytes
+            # Always keep the entry just loaded, even if it alone exceeds the budget
+            while len(self._entries) > 1 and (self.total_bytes > self.max_bytes or len(self._entries) > self.max_entries):
+                _, (_, _, evicted_bytes) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_bytes
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {'tenants': len(self._entries), 'bytes': self.total_bytes, 'max_bytes': self.max_bytes}
+
+
+TENANT_CACHE = TenantCache()
+
+
+def partition_by_site(source_dir='.', root=TENANT_ROOT):
+    """Split the repo-root data into one tenant directory per site
+
+    Gap records go to a Parquet file sorted by provider and measure so
+    per-provider and per-measure reads touch few row groups. Site and
+    provider rollups are filtered to the site; org-level tables are copied.
+    An eligibility extract is split by its Site_Location column, or by the
+    site's gap patients when it has none.
+    """
+    care_gaps, _, site_performance, provider_performance, _, _ = dashboard_data.load_dashboard_data(source_dir)
+    providers, _, trends = scorecard_data.load_scorecard_data(source_dir)
+    eligibility_path = os.path.join(source_dir, compliance_engine.ELIGIBILITY_FILE)
+    eligibility = pd.read_csv(eligibility_path) if os.path.exists(eligibility_path) else None
+
+    written = []
+    for site, site_gaps in care_gaps.groupby('Site_Location'):
+        path = os.path.join(root, tenant_slug(site))
+        os.makedirs(path, exist_ok=True)
+
+        site_gaps = site_gaps.sort_values(['Provider_Name', 'Measure_Name', 'Open_Date'])
+        site_gaps.to_parquet(os.path.join(path, 'hedis_care_gaps.parquet'), index=False, row_group_size=100_000)
+
+        site_providers = site_gaps['Provider_Name'].unique()
+        site_performance[site_performance['Site_Location'] == site].to_csv(
+            os.path.join(path, dashboard_data.DATA_FILES['site_performance']), index=False)
+        provider_performance[provider_performance['Provider_Name'].isin(site_providers)].to_csv(
+            os.path.join(path, dashboard_data.DATA_FILES['provider_performance']), index=False)
+        providers[providers['Provider_Name'].isin(site_providers)].to_csv(
+            os.path.join(path, scorecard_data.DATA_FILES['providers']), index=False)
+        trends[trends['Provider_Name'].isin(site_providers)].to_csv(
+            os.path.join(path, scorecard_data.DATA_FILES['trends']), index=False)
+
+        tenant_eligibility = os.path.join(path, compliance_engine.ELIGIBILITY_FILE)
+        if eligibility is not None:
+            if 'Site_Location' in eligibility.columns:
+                site_eligibility = eligibility[eligibility['Site_Location'] == site]
+            else:
+                site_eligibility = eligibility[eligibility['Patient_ID'].isin(site_gaps['Patient_ID'])]
+            site_eligibility.to_csv(tenant_eligibility, index=False)
+        elif os.path.exists(tenant_eligibility):
+            # The root no longer has an extract; a stale copy would shadow derived denominators
+            os.remove(tenant_eligibility)
+
+        for filename in SHARED_FILES:
+            source = dashboard_data.source_path(source_dir, filename)
+            shutil.copyfile(source, os.path.join(path, os.path.basename(source)))
+        with open(os.path.join(path, data_validation.SHARED_TABLES_FILE), 'w') as f:
+            json.dump(SHARED_TABLES, f)
+        written.append(path)
+    return written
+
+
+if __name__ == '__main__':
+    # python tenants.py [source_dir] -> tenants/<site-slug>/
+    for path in partition_by_site(sys.argv[1] if len(sys.argv) > 1 else '.'):
+        print(path)
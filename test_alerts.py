@@ -0,0 +1,45 @@
+import pandas as pd
+
+from alerts import evaluate
+
+metrics = pd.DataFrame({
+    'Metric_Name': ['HEDIS_Compliance_Rate'],
+    'Good_Threshold': [87.0],
+    'Warning_Threshold': [83.0]
+})
+
+
+def make_rows(value):
+    return pd.DataFrame({
+        'Entity_Type': ['provider'],
+        'Entity': ['Dr. Maria Rodriguez'],
+        'Metric': ['HEDIS_Compliance_Rate'],
+        'Value': [value],
+        'Target': [float('nan')]
+    })
+
+
+def test_value_crossing_threshold_emits_event():
+    _, state = evaluate(make_rows(84.8), None, metrics, 't0')
+    assert state['Status'].tolist() == ['yellow']
+
+    events, state = evaluate(make_rows(87.8), state, metrics, 't1')
+    assert [(event['previous_status'], event['status'], event['direction']) for event in events] == \
+        [('yellow', 'green', 'improved')]
+    assert state['Status'].tolist() == ['green']
+
+
+def test_threshold_edit_emits_event():
+    _, state = evaluate(make_rows(84.8), None, metrics, 't0')
+
+    stricter = metrics.assign(Warning_Threshold=[85.0])
+    events, state = evaluate(make_rows(84.8), state, stricter, 't1')
+    assert [(event['previous_status'], event['status']) for event in events] == [('yellow', 'red')]
+    assert state['Status'].tolist() == ['red']
+
+
+def test_unchanged_rows_keep_status_without_events():
+    _, state = evaluate(make_rows(84.8), None, metrics, 't0')
+    events, state = evaluate(make_rows(84.8), state, metrics, 't1')
+    assert events == []
+    assert state['Status'].tolist() == ['yellow']
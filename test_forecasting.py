@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+
+from forecasting import fit_survival, project_dimension
+
+
+def make_gaps(statuses, days_to_close):
+    open_date = pd.Timestamp('2024-01-01')
+    closed = np.array(statuses) == 'Closed'
+    return pd.DataFrame({
+        'Gap_Status': statuses,
+        'Open_Date': open_date,
+        'Closed_Date': [open_date + pd.Timedelta(days=d) if c else pd.NaT for c, d in zip(closed, days_to_close)],
+        'Days_Open': days_to_close,
+        'Measure_Name': 'HbA1c Testing'
+    })
+
+
+def test_survival_keeps_falling_past_longest_closure():
+    days = np.array([10, 20, 30, 90])
+    closed = np.array([True, True, True, False])
+    survival = fit_survival(np.zeros(4, dtype=int), days, closed, 1, 120)[0]
+    assert survival[119] < survival[90] < survival[30]
+
+
+def test_old_open_gap_has_nonzero_closure_probability():
+    care_gaps = make_gaps(['Closed', 'Closed', 'Closed', 'Open'], [10, 20, 30, 90])
+    result = project_dimension(care_gaps, 'Measure_Name', horizon=30)
+    assert result.loc[0, 'Open_Gaps'] == 1
+    assert 0 < result.loc[0, 'Expected_Closures'] < 1
@@ -0,0 +1,60 @@
+import pandas as pd
+
+from snapshots import DELETED, SnapshotStore, apply_changes, diff_gaps
+
+
+def make_gaps(rows):
+    care_gaps = pd.DataFrame(rows, columns=['Gap_ID', 'Gap_Status', 'Open_Date', 'Closed_Date', 'Days_Open', 'Patient_Age'])
+    care_gaps['Open_Date'] = pd.to_datetime(care_gaps['Open_Date'])
+    care_gaps['Closed_Date'] = pd.to_datetime(care_gaps['Closed_Date'])
+    return care_gaps
+
+
+def by_id(care_gaps):
+    return care_gaps.sort_values('Gap_ID').reset_index(drop=True)
+
+
+previous = make_gaps([
+    ('G1', 'Open', '2024-06-01', None, 29, 60),
+    ('G2', 'Open', '2024-06-10', None, 20, 45),
+    ('G3', 'Closed', '2024-05-01', '2024-05-20', 19, 70),
+    ('G5', 'Open', '2024-06-15', None, 15, 52)
+])
+
+# A day later: G1 closed, G2 deleted, G4 added, G5 only one day older
+current = make_gaps([
+    ('G1', 'Closed', '2024-06-01', '2024-07-01', 30, 60),
+    ('G3', 'Closed', '2024-05-01', '2024-05-20', 19, 70),
+    ('G4', 'Open', '2024-07-01', None, 0, 38),
+    ('G5', 'Open', '2024-06-15', None, 16, 52)
+])
+
+
+def test_round_trip_with_tombstones_restores_rows_and_dtypes():
+    changes = diff_gaps(previous, current)
+    assert sorted(changes['Gap_ID']) == ['G1', 'G2', 'G4']
+    assert changes.loc[changes['Gap_ID'] == 'G2', DELETED].item()
+
+    rebuilt = apply_changes(previous, changes)
+    pd.testing.assert_frame_equal(by_id(rebuilt).drop(columns='Days_Open'), by_id(current).drop(columns='Days_Open'))
+    assert rebuilt['Patient_Age'].dtype == current['Patient_Age'].dtype
+
+
+def test_age_alone_is_not_a_change():
+    aged = previous.assign(Days_Open=previous['Days_Open'] + (previous['Gap_Status'] == 'Open'))
+    assert diff_gaps(previous, aged).empty
+
+
+def test_added_column_rewrites_every_row():
+    widened = current.assign(Outreach_Status='Pending')
+    rebuilt = apply_changes(previous, diff_gaps(previous, widened))
+    pd.testing.assert_frame_equal(by_id(rebuilt)[widened.columns], by_id(widened))
+
+
+def test_days_open_recomputed_on_reconstruction(tmp_path):
+    store = SnapshotStore(tmp_path)
+    store.record('2024-06-30', previous, {})
+    store.record('2024-07-01', current, {})
+
+    rebuilt = by_id(store.care_gaps_as_of('2024-07-01'))
+    pd.testing.assert_frame_equal(rebuilt, by_id(current))